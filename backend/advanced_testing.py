@@ -6,13 +6,12 @@ Real implementations of speed, DNS leak, SSL fingerprinting, and stability testi
 
 import asyncio
 import aiohttp
-import aiohttp_socks
 import time
-import statistics
 import hashlib
 import ssl
 import socket
 import struct
+import numpy as np
 import dns.asyncresolver
 import dns.exception
 from typing import Dict, List, Optional, Tuple, Any
@@ -20,6 +19,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 import random
+import os
 import ipaddress
 from urllib.parse import urlparse
 import certifi
@@ -27,9 +27,13 @@ import httpx
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from webrtc_alternative import IPLeakDetector, IPLeakResult
+from proxy_sessions import ProxySessionCache, proxy_client, proxy_session
 
 logger = logging.getLogger(__name__)
 
+# Read/write size for streamed speed-test transfers
+SPEED_TEST_CHUNK_SIZE = 1 << 16
+
 
 @dataclass
 class SpeedTestResult:
@@ -88,7 +92,9 @@ class LatencyStabilityResult:
 class ProxySpeedTester:
     """Tests real bandwidth through proxies"""
     
-    def __init__(self):
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        self.sessions = sessions
+        
         # Test file URLs of different sizes
         self.test_files = {
             'small': {
@@ -147,29 +153,28 @@ class ProxySpeedTester:
     async def _test_download(self, proxy_url: str, test_file: Dict) -> Dict:
         """Test download speed through proxy"""
         bytes_downloaded = 0
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Parse proxy URL
         parsed = urlparse(proxy_url)
         
         if parsed.scheme in ['socks4', 'socks5']:
-            connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
             timeout = aiohttp.ClientTimeout(total=60)
             
-            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-                async with session.get(test_file['url']) as response:
-                    chunk_size = 8192
-                    async for chunk in response.content.iter_chunked(chunk_size):
+            async with proxy_session(proxy_url, self.sessions) as session:
+                async with session.get(test_file['url'], timeout=timeout) as response:
+                    async for chunk in response.content.iter_chunked(SPEED_TEST_CHUNK_SIZE):
                         bytes_downloaded += len(chunk)
         else:
             # HTTP proxy
-            async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=60.0) as client:
-                async with client.stream('GET', test_file['url']) as response:
-                    async for chunk in response.aiter_bytes(8192):
+            async with proxy_client(proxy_url, self.sessions) as client:
+                async with client.stream('GET', test_file['url'], timeout=60.0) as response:
+                    async for chunk in response.aiter_bytes(SPEED_TEST_CHUNK_SIZE):
                         bytes_downloaded += len(chunk)
         
-        download_time = time.time() - start_time
-        speed_mbps = (bytes_downloaded * 8 / 1000000) / download_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        download_time = elapsed_ns / 1e9
+        speed_mbps = bytes_downloaded * 8000 / elapsed_ns  # bits/ns * 1000 = Mbps
         
         return {
             'bytes': bytes_downloaded,
@@ -179,47 +184,62 @@ class ProxySpeedTester:
     
     async def _test_upload(self, proxy_url: str, size_bytes: int) -> Dict:
         """Test upload speed through proxy"""
-        # Generate random data to upload
-        upload_data = bytes(random.getrandbits(8) for _ in range(min(size_bytes, 1048576)))  # Max 1MB upload
+        upload_size = min(size_bytes, 1048576)  # Max 1MB upload
+        headers = {
+            'Content-Type': 'application/octet-stream',
+            # Explicit length keeps the streamed body from being sent chunked
+            'Content-Length': str(upload_size)
+        }
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         parsed = urlparse(proxy_url)
         
         if parsed.scheme in ['socks4', 'socks5']:
-            connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
             timeout = aiohttp.ClientTimeout(total=60)
             
-            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async with proxy_session(proxy_url, self.sessions) as session:
                 async with session.post(
                     self.upload_endpoint,
-                    data=upload_data,
-                    headers={'Content-Type': 'application/octet-stream'}
+                    data=self._upload_body(upload_size),
+                    timeout=timeout,
+                    headers=headers
                 ) as response:
                     await response.read()
         else:
             # HTTP proxy
-            async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=60.0) as client:
+            async with proxy_client(proxy_url, self.sessions) as client:
                 response = await client.post(
                     self.upload_endpoint,
-                    content=upload_data,
-                    headers={'Content-Type': 'application/octet-stream'}
+                    content=self._upload_body(upload_size),
+                    timeout=60.0,
+                    headers=headers
                 )
         
-        upload_time = time.time() - start_time
-        speed_mbps = (len(upload_data) * 8 / 1000000) / upload_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        upload_time = elapsed_ns / 1e9
+        speed_mbps = upload_size * 8000 / elapsed_ns
         
         return {
-            'bytes': len(upload_data),
+            'bytes': upload_size,
             'time': upload_time,
             'speed_mbps': speed_mbps
         }
 
 
+    async def _upload_body(self, size_bytes: int):
+        """Stream random upload data one chunk at a time"""
+        # Random bytes so a compressing proxy can't shrink the payload
+        for offset in range(0, size_bytes, SPEED_TEST_CHUNK_SIZE):
+            yield os.urandom(min(SPEED_TEST_CHUNK_SIZE, size_bytes - offset))
+
+
 class DNSLeakDetector:
     """Detects DNS leaks through proxies"""
     
-    def __init__(self):
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        self.sessions = sessions
+        
         # DNS servers that echo back the resolver's IP
         self.leak_test_domains = [
             'resolver1.opendns.com',  # Returns resolver IP
@@ -245,26 +265,32 @@ class DNSLeakDetector:
         try:
             resolver_ips = set()
             tested_domains = []
+            domains = list(dict.fromkeys(self.leak_test_domains))
             
-            # Test 1: Direct DNS queries to echo services
-            for domain in self.leak_test_domains:
-                try:
-                    # Query through proxy
-                    resolver_ip = await self._resolve_through_proxy(proxy_url, domain)
-                    if resolver_ip:
-                        resolver_ips.add(resolver_ip)
-                        tested_domains.append(domain)
-                except Exception as e:
-                    logger.debug(f"DNS test failed for {domain}: {e}")
-            
+            # Test 1: Direct DNS queries to echo services, all through proxy at once
             # Test 2: Check which DNS server is being used
-            dns_servers = await self._identify_dns_servers(proxy_url)
+            *answers, dns_servers = await asyncio.gather(
+                *(self._resolve_through_proxy(proxy_url, domain) for domain in domains),
+                self._identify_dns_servers(proxy_url),
+                return_exceptions=True
+            )
+            
+            for domain, resolver_ip in zip(domains, answers):
+                if isinstance(resolver_ip, Exception):
+                    logger.debug(f"DNS test failed for {domain}: {resolver_ip}")
+                elif resolver_ip:
+                    resolver_ips.add(resolver_ip)
+                    tested_domains.append(domain)
+            
+            if isinstance(dns_servers, Exception):
+                logger.debug(f"DNS server identification failed: {dns_servers}")
+                dns_servers = []
             
             # Analyze results
             is_leaking = self._analyze_leak(resolver_ips, expected_exit_ip, dns_servers)
             
             # Calculate confidence
-            confidence = len(tested_domains) / len(self.leak_test_domains)
+            confidence = len(tested_domains) / len(domains)
             
             return DNSLeakResult(
                 is_leaking=is_leaking,
@@ -299,9 +325,8 @@ class DNSLeakDetector:
         
         try:
             if parsed.scheme in ['socks4', 'socks5']:
-                connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
-                async with aiohttp.ClientSession(connector=connector) as session:
-                    async with session.get(test_url, timeout=5) as response:
+                async with proxy_session(proxy_url, self.sessions) as session:
+                    async with session.get(test_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
                         # Some of these services return the IP in response body
                         text = await response.text()
                         # Extract IP from response
@@ -310,8 +335,8 @@ class DNSLeakDetector:
                         if ip_match:
                             return ip_match.group(1)
             else:
-                async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=5.0) as client:
-                    response = await client.get(test_url)
+                async with proxy_client(proxy_url, self.sessions) as client:
+                    response = await client.get(test_url, timeout=5.0)
                     # Extract IP from response
                     import re
                     ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', response.text)
@@ -361,7 +386,8 @@ class DNSLeakDetector:
 class SSLFingerprinter:
     """Analyzes SSL/TLS connections for fingerprinting and interception"""
     
-    def __init__(self):
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        self.sessions = sessions
         self.known_interceptors = {
             # Known MITM certificate subjects
             'Fortinet', 'Blue Coat', 'Zscaler', 'Palo Alto',
@@ -433,8 +459,7 @@ class SSLFingerprinter:
         try:
             if parsed.scheme in ['socks4', 'socks5']:
                 # For SOCKS, we need to establish connection first
-                connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
-                async with aiohttp.ClientSession(connector=connector) as session:
+                async with proxy_session(proxy_url, self.sessions) as session:
                     async with session.get(f'https://{host}:{port}', ssl=ssl_context) as response:
                         # Get SSL info from response
                         if hasattr(response.connection, 'transport'):
@@ -449,7 +474,7 @@ class SSLFingerprinter:
                                     cert = x509.load_der_x509_certificate(cert_der, default_backend())
                                     ssl_info['certificate'] = self._parse_certificate(cert)
             else:
-                # HTTP proxy - use httpx
+                # HTTP proxy - use httpx (unpooled: this probe needs verify=False)
                 async with httpx.AsyncClient(proxies={'all://': proxy_url}, verify=False) as client:
                     response = await client.get(f'https://{host}:{port}')
                     # Extract SSL info (limited with httpx)
@@ -528,7 +553,8 @@ class SSLFingerprinter:
 class LatencyStabilityAnalyzer:
     """Analyzes proxy latency stability and jitter"""
     
-    def __init__(self):
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        self.sessions = sessions
         self.test_endpoints = [
             'http://www.google.com',
             'http://www.cloudflare.com',
@@ -537,10 +563,12 @@ class LatencyStabilityAnalyzer:
         self.samples = 20  # Number of latency samples
         self.sample_interval = 0.5  # Seconds between samples
     
-    async def analyze_stability(self, proxy_url: str) -> LatencyStabilityResult:
+    async def analyze_stability(self, proxy_url: str,
+                                progress: Optional[asyncio.Queue] = None) -> LatencyStabilityResult:
         """
         Measure latency stability over time
         Tests consistency and jitter
+        Posts each sample index to `progress` once it is measured
         """
         try:
             measurements = []
@@ -555,6 +583,9 @@ class LatencyStabilityAnalyzer:
                 else:
                     failed_requests += 1
                 
+                if progress is not None:
+                    progress.put_nowait(i)
+                
                 # Wait between measurements
                 if i < self.samples - 1:
                     await asyncio.sleep(self.sample_interval)
@@ -574,14 +605,15 @@ class LatencyStabilityAnalyzer:
                 )
             
             # Calculate statistics
-            min_latency = min(measurements)
-            max_latency = max(measurements)
-            avg_latency = statistics.mean(measurements)
-            median_latency = statistics.median(measurements)
-            std_deviation = statistics.stdev(measurements) if len(measurements) > 1 else 0
+            samples = np.asarray(measurements, dtype=np.float64)
+            min_latency = float(samples.min())
+            max_latency = float(samples.max())
+            avg_latency = float(samples.mean())
+            median_latency = float(np.median(samples))
+            std_deviation = float(samples.std(ddof=1))
             
             # Calculate jitter (average difference between consecutive measurements)
-            jitter = self._calculate_jitter(measurements)
+            jitter = self._calculate_jitter(samples)
             
             # Calculate packet loss
             packet_loss = (failed_requests / self.samples) * 100
@@ -623,40 +655,34 @@ class LatencyStabilityAnalyzer:
         # Rotate through test endpoints
         endpoint = random.choice(self.test_endpoints)
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             parsed = urlparse(proxy_url)
             
             if parsed.scheme in ['socks4', 'socks5']:
-                connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
                 timeout = aiohttp.ClientTimeout(total=10)
                 
-                async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-                    async with session.get(endpoint) as response:
+                async with proxy_session(proxy_url, self.sessions) as session:
+                    async with session.get(endpoint, timeout=timeout) as response:
                         await response.read()
             else:
-                async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=10.0) as client:
-                    response = await client.get(endpoint)
+                async with proxy_client(proxy_url, self.sessions) as client:
+                    response = await client.get(endpoint, timeout=10.0)
             
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter_ns() - start_ns) / 1e6
             return latency_ms
             
         except Exception as e:
             logger.debug(f"Latency measurement failed: {e}")
             return -1  # Indicate failure
     
-    def _calculate_jitter(self, measurements: List[float]) -> float:
+    def _calculate_jitter(self, measurements) -> float:
         """Calculate jitter (variation in latency)"""
         if len(measurements) < 2:
             return 0
         
-        differences = []
-        for i in range(1, len(measurements)):
-            diff = abs(measurements[i] - measurements[i-1])
-            differences.append(diff)
-        
-        return statistics.mean(differences) if differences else 0
+        return float(np.abs(np.diff(measurements)).mean())
     
     def _calculate_stability_score(self, std_dev: float, jitter: float, 
                                  packet_loss: float, avg_latency: float) -> float:
@@ -688,12 +714,16 @@ class LatencyStabilityAnalyzer:
 class AdvancedProxyTester:
     """Coordinates all advanced proxy tests"""
     
-    def __init__(self):
-        self.speed_tester = ProxySpeedTester()
-        self.dns_detector = DNSLeakDetector()
-        self.ssl_fingerprinter = SSLFingerprinter()
-        self.stability_analyzer = LatencyStabilityAnalyzer()
-        self.ip_leak_detector = IPLeakDetector()
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        self.speed_tester = ProxySpeedTester(sessions)
+        self.dns_detector = DNSLeakDetector(sessions)
+        self.ssl_fingerprinter = SSLFingerprinter(sessions)
+        self.stability_analyzer = LatencyStabilityAnalyzer(sessions)
+        self.ip_leak_detector = IPLeakDetector(sessions)
+    
+    async def close(self):
+        """Release the connections held by the testers"""
+        await self.ip_leak_detector.close()
     
     async def run_all_tests(self, ip: str, port: int, protocol: str) -> Dict:
         """Run all advanced tests on a proxy"""
@@ -706,21 +736,23 @@ class AdvancedProxyTester:
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        # Run tests in parallel where possible
-        tasks = [
-            self.speed_tester.test_speed(proxy_url, 'small'),
-            self.stability_analyzer.analyze_stability(proxy_url),
-            self.ssl_fingerprinter.fingerprint_ssl(proxy_url)
-        ]
-        
-        speed_result, stability_result, ssl_result = await asyncio.gather(*tasks)
-        
+        # All five tests are independent network probes, so run them together
         # DNS leak test needs the exit IP from basic proxy test
         # For now, use the proxy IP as expected exit
-        dns_result = await self.dns_detector.test_dns_leak(proxy_url, ip)
-        
-        # IP leak detection (WebRTC alternative)
-        ip_leak_result = await self.ip_leak_detector.detect_leaks(proxy_url, ip)
+        (
+            speed_result,
+            stability_result,
+            ssl_result,
+            dns_result,
+            ip_leak_result
+        ) = await asyncio.gather(
+            self.speed_tester.test_speed(proxy_url, 'small'),
+            self.stability_analyzer.analyze_stability(proxy_url),
+            self.ssl_fingerprinter.fingerprint_ssl(proxy_url),
+            self.dns_detector.test_dns_leak(proxy_url, ip),
+            # IP leak detection (WebRTC alternative)
+            self.ip_leak_detector.detect_leaks(proxy_url, ip)
+        )
         
         # Package results
         results['speed_test'] = {
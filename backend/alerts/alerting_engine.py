@@ -7,6 +7,7 @@ Complex rule-based alerting with conditions and actions
 import asyncio
 import json
 import re
+import time
 from abc import ABC, abstractmethod
 from collections import defaultdict, deque
 from datetime import datetime, timedelta
@@ -15,7 +16,6 @@ from dataclasses import dataclass, field
 from enum import Enum
 import logging
 import ast
-import operator
 import hashlib
 
 try:
@@ -120,6 +120,17 @@ class AlertCondition:
         return value
 
 
+def _to_ns(delta: timedelta) -> int:
+    """Convert a timedelta to integer nanoseconds"""
+    return delta // timedelta(microseconds=1) * 1000
+
+
+# Names and syntax allowed in a custom condition_logic expression
+CONDITION_NAME = re.compile(r'C(\d+)')
+LOGIC_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or,
+               ast.UnaryOp, ast.Not, ast.Load)
+
+
 @dataclass
 class AlertRule:
     """Alert rule definition"""
@@ -153,6 +164,10 @@ class AlertRule:
     escalate_after: Optional[timedelta] = None
     auto_resolve_after: Optional[timedelta] = None
     
+    # ((condition_logic, len(conditions)), code) for the last compiled custom
+    # expression; code is None if it failed to compile
+    _logic_cache: Any = field(default=None, init=False, repr=False, compare=False)
+    
     def evaluate(self, data: Dict[str, Any], context: Optional[Dict] = None) -> bool:
         """Evaluate rule conditions"""
         if not self.enabled:
@@ -174,38 +189,48 @@ class AlertRule:
     
     def _evaluate_custom_logic(self, data: Dict[str, Any]) -> bool:
         """Evaluate custom condition logic"""
-        # Replace condition indices with actual results
-        expression = self.condition_logic
+        code = self._logic_code()
+        if code is None:
+            return False
         
-        for i, condition in enumerate(self.conditions):
-            result = condition.evaluate(data)
-            expression = expression.replace(f"C{i}", str(result))
+        results = {f"C{i}": condition.evaluate(data)
+                   for i, condition in enumerate(self.conditions)}
         
         try:
-            # Safely evaluate boolean expression
-            return self._safe_eval(expression)
+            return bool(eval(code, {"__builtins__": {}}, results))
         except Exception as e:
             logger.error(f"Custom logic evaluation error: {e}")
             return False
     
-    def _safe_eval(self, expression: str) -> bool:
-        """Safely evaluate boolean expression"""
-        # Allow only boolean operations
-        allowed_names = {
-            'True': True,
-            'False': False,
-            'and': operator.and_,
-            'or': operator.or_,
-            'not': operator.not_
-        }
-        
-        code = compile(expression, '<string>', 'eval')
-        
-        for name in code.co_names:
-            if name not in allowed_names:
-                raise ValueError(f"Unsafe expression: {name}")
-        
-        return eval(code, {"__builtins__": {}}, allowed_names)
+    def _logic_code(self):
+        """Compiled condition_logic, recompiled whenever it or the condition count changes"""
+        key = (self.condition_logic, len(self.conditions))
+        if self._logic_cache is None or self._logic_cache[0] != key:
+            try:
+                code = self._compile_logic(self.condition_logic)
+            except Exception as e:
+                # A bad rule never matches; it must not break rule loading
+                logger.error(f"Custom logic evaluation error in rule {self.id}: {e}")
+                code = None
+            self._logic_cache = (key, code)
+        return self._logic_cache[1]
+    
+    def _compile_logic(self, expression: str):
+        """Compile a boolean expression over C0..Cn once, rejecting anything else"""
+        tree = ast.parse(expression, '<alert-logic>', 'eval')
+        
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                match = CONDITION_NAME.fullmatch(node.id)
+                if not match or int(match.group(1)) >= len(self.conditions):
+                    raise ValueError(f"Unsafe expression: {node.id}")
+            elif isinstance(node, ast.Constant):
+                if not isinstance(node.value, bool):
+                    raise ValueError(f"Unsafe expression: {node.value!r}")
+            elif not isinstance(node, LOGIC_NODES):
+                raise ValueError(f"Unsafe expression: {type(node).__name__}")
+        
+        return compile(tree, '<alert-logic>', 'eval')
     
     def _evaluate_expression(self, expression: str, context: Dict) -> bool:
         """Evaluate suppression expression"""
@@ -260,23 +285,25 @@ class Alert:
     # Actions taken
     actions_executed: List[str] = field(default_factory=list)
     
-    def resolve(self, resolved_by: Optional[str] = None):
+    # Timestamp methods take `now` so the engine can stamp alerts with its
+    # own (injectable) clock; they fall back to wall time when called directly
+    def resolve(self, resolved_by: Optional[str] = None, now: Optional[datetime] = None):
         """Resolve alert"""
         self.status = "resolved"
-        self.resolved_at = datetime.utcnow()
+        self.resolved_at = now or datetime.utcnow()
         if resolved_by:
             self.context['resolved_by'] = resolved_by
     
-    def acknowledge(self, acknowledged_by: str):
+    def acknowledge(self, acknowledged_by: str, now: Optional[datetime] = None):
         """Acknowledge alert"""
         self.status = "acknowledged"
-        self.acknowledged_at = datetime.utcnow()
+        self.acknowledged_at = now or datetime.utcnow()
         self.acknowledged_by = acknowledged_by
     
-    def update_occurrence(self):
+    def update_occurrence(self, now: Optional[datetime] = None):
         """Update occurrence count"""
         self.occurrence_count += 1
-        self.last_occurrence = datetime.utcnow()
+        self.last_occurrence = now or datetime.utcnow()
 
 
 class AlertAction(ABC):
@@ -333,12 +360,29 @@ class EmailAction(AlertAction):
         pass
 
 
+# How long events are kept for time-window evaluation
+EVENT_RETENTION_NS = _to_ns(timedelta(hours=1))
+
+
 class AlertingEngine:
     """
     Advanced alerting engine with rule evaluation and actions
     """
     
-    def __init__(self, webhook_manager: Optional[WebhookManager] = None):
+    def __init__(self,
+                 webhook_manager: Optional[WebhookManager] = None,
+                 clock: Callable[[], datetime] = datetime.utcnow,
+                 monotonic_clock: Callable[[], int] = time.monotonic_ns):
+        """
+        Args:
+            webhook_manager: Manager used by webhook actions
+            clock: Source of the current UTC time, used for alert timestamps
+            monotonic_clock: Integer nanosecond clock stamping events for
+                   time windows and cooldowns; inject fakes of both clocks to
+                   drive them without sleeping
+        """
+        self._now = clock
+        self._now_ns = monotonic_clock
         self.rules: Dict[str, AlertRule] = {}
         self.alerts: Dict[str, Alert] = {}
         self.alert_history: deque = deque(maxlen=10000)
@@ -349,11 +393,11 @@ class AlertingEngine:
             'log': LogAction(),
         }
         
-        # Event tracking for time windows
+        # Event tracking for time windows (monotonic ns timestamps)
         self.event_windows: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
         
         # Rate limiting
-        self.rate_limiters: Dict[str, List[datetime]] = defaultdict(list)
+        self.rate_limiters: Dict[str, List[int]] = defaultdict(list)
         
         # Correlation tracking
         self.correlation_cache: Dict[str, List[Alert]] = defaultdict(list)
@@ -387,6 +431,11 @@ class AlertingEngine:
         self.rules[rule.id] = rule
         logger.info(f"Added alert rule: {rule.name}")
     
+    def add_rules(self, rules: List[AlertRule]):
+        """Add several alert rules in one pass"""
+        self.rules.update((rule.id, rule) for rule in rules)
+        logger.info(f"Added {len(rules)} alert rules")
+    
     def remove_rule(self, rule_id: str):
         """Remove alert rule"""
         if rule_id in self.rules:
@@ -405,7 +454,7 @@ class AlertingEngine:
         
         # Track event for time windows
         self.event_windows[event_type].append({
-            'timestamp': datetime.utcnow(),
+            'timestamp': self._now_ns(),
             'data': data
         })
         
@@ -451,7 +500,7 @@ class AlertingEngine:
         
         if existing_alert:
             # Update existing alert
-            existing_alert.update_occurrence()
+            existing_alert.update_occurrence(self._now())
             
             # Check if we should re-trigger actions
             if existing_alert.occurrence_count % 5 == 0:  # Every 5 occurrences
@@ -460,14 +509,17 @@ class AlertingEngine:
             return None
         
         # Create new alert
+        now = self._now()
         alert = Alert(
-            id=f"{rule.id}_{int(datetime.utcnow().timestamp())}",
+            id=f"{rule.id}_{int(now.timestamp())}",
             rule_id=rule.id,
             rule_name=rule.name,
             severity=rule.severity,
             message=self._format_message(rule, data),
             data=data,
             fingerprint=fingerprint,
+            triggered_at=now,
+            last_occurrence=now,
             context=context,
             tags=rule.tags
         )
@@ -496,7 +548,7 @@ class AlertingEngine:
         if not rule.time_window:
             return True
         
-        cutoff = datetime.utcnow() - rule.time_window
+        cutoff = self._now_ns() - _to_ns(rule.time_window)
         events = self.event_windows[event_type]
         
         # Count matching events in window
@@ -513,11 +565,11 @@ class AlertingEngine:
         if not rule.cooldown_period:
             return True
         
-        now = datetime.utcnow()
+        now = self._now_ns()
         rule_id = rule.id
         
         # Clean old entries
-        cutoff = now - rule.cooldown_period
+        cutoff = now - _to_ns(rule.cooldown_period)
         self.rate_limiters[rule_id] = [
             timestamp for timestamp in self.rate_limiters[rule_id]
             if timestamp > cutoff
@@ -597,7 +649,7 @@ class AlertingEngine:
         """Build context for rule evaluation"""
         return {
             'event_type': event_type,
-            'timestamp': datetime.utcnow(),
+            'timestamp': self._now(),
             'active_alerts': len([a for a in self.alerts.values() if a.status == 'active']),
             'recent_alerts': len(self.alert_history)
         }
@@ -609,7 +661,7 @@ class AlertingEngine:
             correlated_alerts = [
                 a for a in self.alert_history
                 if a.rule_id == correlated_rule_id and
-                (datetime.utcnow() - a.triggered_at) < timedelta(minutes=5)
+                (self._now() - a.triggered_at) < timedelta(minutes=5)
             ]
             
             if correlated_alerts:
@@ -621,7 +673,7 @@ class AlertingEngine:
         await asyncio.sleep(after.total_seconds())
         
         if alert.status == 'active':
-            alert.resolve('auto')
+            alert.resolve('auto', self._now())
             logger.info(f"Alert auto-resolved: {alert.id}")
     
     async def _cleanup_worker(self):
@@ -629,7 +681,7 @@ class AlertingEngine:
         while self.running:
             try:
                 # Clean old events
-                cutoff = datetime.utcnow() - timedelta(hours=1)
+                cutoff = self._now_ns() - EVENT_RETENTION_NS
                 
                 for event_list in self.event_windows.values():
                     while event_list and event_list[0]['timestamp'] < cutoff:
@@ -639,7 +691,7 @@ class AlertingEngine:
                 resolved_alerts = [
                     alert_id for alert_id, alert in self.alerts.items()
                     if alert.status == 'resolved' and 
-                    (datetime.utcnow() - alert.resolved_at) > timedelta(hours=24)
+                    (self._now() - alert.resolved_at) > timedelta(hours=24)
                 ]
                 
                 for alert_id in resolved_alerts:
@@ -650,6 +702,22 @@ class AlertingEngine:
             except Exception as e:
                 logger.error(f"Cleanup worker error: {e}")
     
+    def acknowledge_alert(self, alert_id: str, acknowledged_by: str) -> bool:
+        """Acknowledge an alert, stamped with the engine clock"""
+        alert = self.alerts.get(alert_id)
+        if alert is None:
+            return False
+        alert.acknowledge(acknowledged_by, self._now())
+        return True
+    
+    def resolve_alert(self, alert_id: str, resolved_by: Optional[str] = None) -> bool:
+        """Resolve an alert, stamped with the engine clock"""
+        alert = self.alerts.get(alert_id)
+        if alert is None:
+            return False
+        alert.resolve(resolved_by, self._now())
+        return True
+    
     def get_active_alerts(self) -> List[Alert]:
         """Get all active alerts"""
         return [
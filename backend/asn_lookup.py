@@ -9,11 +9,14 @@ import aiohttp
 import ipaddress
 import json
 import logging
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass
+from collections import OrderedDict
+from types import MappingProxyType
 from datetime import datetime, timedelta
+import numpy as np
 import pyasn
-import socket
+from cache.result_store import PersistentResultStore
 import struct
 
 logger = logging.getLogger(__name__)
@@ -36,9 +39,23 @@ class ASNInfo:
 class ASNLookupService:
     """Real ASN lookup using multiple data sources"""
     
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, store: Optional[PersistentResultStore] = None):
+        # Optional disk-backed store so reruns skip the network entirely
+        self.store = store
+        self.cache: OrderedDict = OrderedDict()
         self.cache_ttl = timedelta(hours=24)
+        self.cache_maxsize = 100000
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Team Cymru bulk whois (one TCP session per batch of IPs)
+        self.cymru_whois_host = 'whois.cymru.com'
+        self.cymru_bulk_size = 1000
+        self.cymru_bulk_timeout = 30
+        
+        # High-value ranges keyed by reputation threshold (rounded to 2dp)
+        self.high_value_ranges_cache: OrderedDict = OrderedDict()
+        self.high_value_ranges_ttl = timedelta(hours=1)
+        self.high_value_ranges_maxsize = 32
         
         # Known hosting/VPN ASNs with high proxy likelihood
         self.known_proxy_asns = {
@@ -64,21 +81,56 @@ class ASNLookupService:
             'AS209': ASNInfo('AS209', 'CenturyLink', 'US', '0.0.0.0/0', 'CenturyLink', reputation_score=0.2),
         }
         
+        # Dense reputation array aligned with the known ASN keys
+        self._asn_keys = tuple(self.known_proxy_asns)
+        self._asn_reputation = np.fromiter(
+            (info.reputation_score for info in self.known_proxy_asns.values()),
+            dtype=np.float32,
+            count=len(self._asn_keys)
+        )
+        
         # Initialize PyASN database (would need actual data file)
         self.pyasn_db = None
         
     async def lookup_ip(self, ip: str) -> Optional[ASNInfo]:
         """Look up ASN information for an IP address"""
         # Check cache
-        cache_key = f"ip:{ip}"
+        cache_key = self._cache_key(ip)
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
             if datetime.utcnow() - timestamp < self.cache_ttl:
+                self.cache.move_to_end(cache_key)
                 return cached_data
+            del self.cache[cache_key]
         
-        # Try multiple data sources
-        asn_info = None
+        # Collapse concurrent misses for the same network into one lookup
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup_and_cache(ip, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
         
+        return await asyncio.shield(task)
+    
+    def _cache_key(self, ip: str) -> str:
+        """Cache by /24 (IPv4) or /48 (IPv6) since ASNs rarely change within one"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return f"ip:{ip}"
+        
+        prefix = 24 if address.version == 4 else 48
+        return f"net:{ipaddress.ip_network(f'{address}/{prefix}', strict=False)}"
+    
+    async def _lookup_and_cache(self, ip: str, cache_key: str) -> Optional[ASNInfo]:
+        """Query the data sources in order and cache the first answer"""
+        # A stored answer goes into the LRU only; re-saving it would reset its expiry
+        stored = self.store.get(f"asn:{cache_key}") if self.store else None
+        if stored:
+            self._remember(cache_key, stored, persist=False)
+            return stored
+        
+        # Try multiple data sources
         # 1. Try RIPE RIS API (real-time BGP data)
         asn_info = await self._lookup_ripe_ris(ip)
         
@@ -90,12 +142,21 @@ class ASNLookupService:
         if not asn_info:
             asn_info = await self._lookup_ip_api(ip)
         
-        # Cache result
+        # Cache result, evicting the least recently used entry when full
         if asn_info:
-            self.cache[cache_key] = (asn_info, datetime.utcnow())
+            self._remember(cache_key, asn_info)
         
         return asn_info
     
+    def _remember(self, cache_key: str, asn_info: ASNInfo, persist: bool = True):
+        """Add a result to the LRU cache and, if it came from a live source, the persistent store"""
+        self.cache[cache_key] = (asn_info, datetime.utcnow())
+        if len(self.cache) > self.cache_maxsize:
+            self.cache.popitem(last=False)
+        
+        if persist and self.store:
+            self.store.set(f"asn:{cache_key}", asn_info)
+    
     async def _lookup_ripe_ris(self, ip: str) -> Optional[ASNInfo]:
         """Query RIPE RIS Looking Glass API"""
         try:
@@ -132,39 +193,113 @@ class ASNLookupService:
     
     async def _lookup_team_cymru(self, ip: str) -> Optional[ASNInfo]:
         """Query Team Cymru whois service"""
+        results = await self._query_team_cymru_bulk([ip])
+        return results.get(ip)
+    
+    async def _query_team_cymru_bulk(self, ips: List[str]) -> Dict[str, ASNInfo]:
+        """
+        Query Team Cymru bulk whois for many IPs over one TCP session
+        Response format: "AS | IP | BGP Prefix | CC | Registry | Allocated | AS Name"
+        """
+        results = {}
+        writer = None
+        
+        # The server echoes addresses in its own form (e.g. compressed IPv6),
+        # so match on the parsed address and key results by the caller's string
+        requested = {}
+        for ip in ips:
+            try:
+                requested[ipaddress.ip_address(ip)] = ip
+            except ValueError:
+                logger.debug(f"Skipping invalid IP in bulk lookup: {ip}")
+        if not requested:
+            return results
+        
         try:
-            # Reverse IP for DNS query
-            octets = ip.split('.')
-            reversed_ip = '.'.join(reversed(octets))
-            query = f"{reversed_ip}.origin.asn.cymru.com"
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.cymru_whois_host, 43), timeout=5
+            )
+            writer.write(("begin\nverbose\n" + "\n".join(requested.values()) + "\nend\n").encode())
+            await writer.drain()
             
-            # DNS TXT query
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, socket.gethostbyname, query)
+            response = await asyncio.wait_for(reader.read(), timeout=self.cymru_bulk_timeout)
             
-            # Parse result (format: "AS#### | IP/CIDR | CC | Registry | Date")
-            if result:
-                parts = result.split('|')
-                if len(parts) >= 3:
-                    asn = parts[0].strip()
-                    ip_range = parts[1].strip()
-                    country = parts[2].strip()
-                    
-                    # Check known ASNs
-                    if asn in self.known_proxy_asns:
-                        return self.known_proxy_asns[asn]
-                    
-                    return ASNInfo(
-                        asn=asn,
-                        name=f"AS{asn.replace('AS', '')}",
-                        country=country,
-                        ip_range=ip_range,
-                        reputation_score=0.5
-                    )
+            for line in response.decode(errors='replace').splitlines():
+                parts = [part.strip() for part in line.split('|')]
+                if len(parts) < 7 or not parts[0].isdigit():
+                    # Header, banner or unrouted ("NA") address
+                    continue
+                
+                asn = f"AS{parts[0]}"
+                try:
+                    ip = requested.get(ipaddress.ip_address(parts[1]))
+                except ValueError:
+                    ip = None
+                if ip is None:
+                    continue
+                
+                # Check known ASNs
+                if asn in self.known_proxy_asns:
+                    results[ip] = self.known_proxy_asns[asn]
+                    continue
+                
+                results[ip] = ASNInfo(
+                    asn=asn,
+                    name=parts[6],
+                    country=parts[3] or 'XX',
+                    ip_range=parts[2] or f"{ip}/32",
+                    description=parts[6],
+                    reputation_score=self._calculate_reputation(parts[6])
+                )
         except Exception as e:
-            logger.debug(f"Team Cymru lookup failed for {ip}: {e}")
+            logger.debug(f"Team Cymru bulk lookup failed for {len(ips)} IPs: {e}")
+        finally:
+            if writer is not None:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
         
-        return None
+        return results
+    
+    async def lookup_ips_bulk(self, ips: List[str]) -> List[Optional[ASNInfo]]:
+        """
+        Look up ASN information for many IPs at once
+        Cache misses are resolved over a single Team Cymru bulk whois session
+        """
+        found: Dict[str, Optional[ASNInfo]] = {}
+        misses: Dict[str, List[str]] = {}
+        
+        for ip in dict.fromkeys(ips):
+            cache_key = self._cache_key(ip)
+            cached = self.cache.get(cache_key)
+            if cached and datetime.utcnow() - cached[1] < self.cache_ttl:
+                self.cache.move_to_end(cache_key)
+                found[ip] = cached[0]
+                continue
+            
+            stored = self.store.get(f"asn:{cache_key}") if self.store else None
+            if stored:
+                self._remember(cache_key, stored, persist=False)
+                found[ip] = stored
+            else:
+                misses.setdefault(cache_key, []).append(ip)
+        
+        # One query per network; the answer covers every IP in it
+        networks = list(misses.items())
+        for start in range(0, len(networks), self.cymru_bulk_size):
+            batch = networks[start:start + self.cymru_bulk_size]
+            results = await self._query_team_cymru_bulk([group[0] for _, group in batch])
+            
+            for cache_key, group in batch:
+                asn_info = results.get(group[0])
+                if asn_info:
+                    self._remember(cache_key, asn_info)
+                for ip in group:
+                    found[ip] = asn_info
+        
+        return [found.get(ip) for ip in ips]
     
     async def _lookup_ip_api(self, ip: str) -> Optional[ASNInfo]:
         """Fallback to ip-api.com"""
@@ -239,23 +374,55 @@ class ASNLookupService:
         
         return score
     
-    async def get_high_value_ranges(self, min_reputation: float = 0.7) -> List[Dict]:
-        """Get IP ranges with high proxy likelihood"""
+    async def get_high_value_ranges(self, min_reputation: float = 0.7,
+                                    top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Get IP ranges with high proxy likelihood
+        With top_k, only the k highest-reputation ASNs are returned, best first
+        """
+        cache_key = (round(min_reputation, 2), top_k)
+        if cache_key in self.high_value_ranges_cache:
+            cached_ranges, timestamp = self.high_value_ranges_cache[cache_key]
+            if datetime.utcnow() - timestamp < self.high_value_ranges_ttl:
+                self.high_value_ranges_cache.move_to_end(cache_key)
+                return self._copy_ranges(cached_ranges)
+            del self.high_value_ranges_cache[cache_key]
+        
+        reputation = self._asn_reputation
+        selected = np.flatnonzero(reputation >= np.float32(cache_key[0]))
+        
+        if top_k is not None:
+            if top_k < len(selected):
+                selected = selected[np.argpartition(-reputation[selected], top_k)[:top_k]]
+            selected = selected[np.argsort(-reputation[selected], kind='stable')]
+        
         ranges = []
         
-        for asn, info in self.known_proxy_asns.items():
-            if info.reputation_score >= min_reputation:
-                # Get actual IP ranges for this ASN
-                # In production, this would query BGP data
-                ranges.append({
-                    'asn': asn,
-                    'name': info.name,
-                    'ranges': self._get_ip_ranges_for_asn(asn),
-                    'reputation': info.reputation_score,
-                    'type': 'vpn' if info.is_vpn_provider else 'hosting'
-                })
-        
-        return ranges
+        for index in selected.tolist():
+            asn = self._asn_keys[index]
+            info = self.known_proxy_asns[asn]
+            
+            # Get actual IP ranges for this ASN
+            # In production, this would query BGP data
+            ranges.append(MappingProxyType({
+                'asn': asn,
+                'name': info.name,
+                'ranges': tuple(self._get_ip_ranges_for_asn(asn)),
+                'reputation': info.reputation_score,
+                'type': 'vpn' if info.is_vpn_provider else 'hosting'
+            }))
+        
+        # The cache keeps a read-only copy; callers each get their own lists
+        ranges = tuple(ranges)
+        self.high_value_ranges_cache[cache_key] = (ranges, datetime.utcnow())
+        if len(self.high_value_ranges_cache) > self.high_value_ranges_maxsize:
+            self.high_value_ranges_cache.popitem(last=False)
+        
+        return self._copy_ranges(ranges)
+    
+    def _copy_ranges(self, ranges: Tuple[Mapping, ...]) -> List[Dict]:
+        """Plain, caller-owned dicts from cached high-value ranges"""
+        return [{**info, 'ranges': list(info['ranges'])} for info in ranges]
     
     def _get_ip_ranges_for_asn(self, asn: str) -> List[str]:
         """Get IP ranges for an ASN (would query real BGP data)"""
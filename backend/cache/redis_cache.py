@@ -5,19 +5,41 @@ High-performance caching layer with pub/sub support
 """
 
 import asyncio
-import json
 import logging
+import math
 import pickle
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Set, Union
 from uuid import UUID
 
+import orjson
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
 from redis.exceptions import RedisError
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+# Types that survive a JSON round trip unchanged (exact types: orjson
+# flattens subclasses such as str enums to their base type)
+JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _is_json_native(value: Any) -> bool:
+    """Whether a value round-trips through JSON: finite floats, exact JSON types, string keys"""
+    if type(value) is dict:
+        return all(type(k) is str and _is_json_native(v) for k, v in value.items())
+    if type(value) is list:
+        return all(_is_json_native(v) for v in value)
+    if type(value) is float:
+        # orjson writes NaN and +-inf as null
+        return math.isfinite(value)
+    return type(value) in JSON_SCALARS
+
 
 class RedisCache:
     """Production-grade Redis caching service"""
@@ -36,6 +58,16 @@ class RedisCache:
     STATS_TTL = 300   # 5 minutes
     BLACKLIST_TTL = 300  # 5 minutes
     
+    # Leading byte marking msgpack payloads; neither JSON nor pickle
+    # output can start with it, so older entries still decode
+    MSGPACK_PREFIX = b'\x01'
+    
+    # Commands sent per pipeline round trip in batch helpers
+    PIPELINE_BATCH_SIZE = 100
+    
+    # Keys requested per SCAN page
+    SCAN_COUNT = 500
+    
     def __init__(self, 
                  redis_url: str = "redis://localhost:6379/0",
                  max_connections: int = 50,
@@ -108,6 +140,43 @@ class RedisCache:
             logger.error(f"Redis SET error for key {key}: {e}")
             return False
     
+    async def set_many(self, pairs: Dict[str, Any], ttl: Optional[int] = None) -> int:
+        """Set multiple values, pipelining PIPELINE_BATCH_SIZE commands per round trip"""
+        items = list(pairs.items())
+        stored = 0
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for start in range(0, len(items), self.PIPELINE_BATCH_SIZE):
+                    for key, value in items[start:start + self.PIPELINE_BATCH_SIZE]:
+                        serialized = self._serialize(value)
+                        if ttl:
+                            pipe.setex(key, ttl, serialized)
+                        else:
+                            pipe.set(key, serialized)
+                    results = await pipe.execute()
+                    stored += sum(1 for r in results if r)
+            return stored
+        except RedisError as e:
+            logger.error(f"Redis batch SET error: {e}")
+            return stored
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get multiple values in key order, pipelining PIPELINE_BATCH_SIZE commands per round trip"""
+        values = []
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for start in range(0, len(keys), self.PIPELINE_BATCH_SIZE):
+                    for key in keys[start:start + self.PIPELINE_BATCH_SIZE]:
+                        pipe.get(key)
+                    results = await pipe.execute()
+                    values.extend(self._deserialize(r) if r else None for r in results)
+            return values
+        except RedisError as e:
+            logger.error(f"Redis batch GET error: {e}")
+            return values + [None] * (len(keys) - len(values))
+    
     async def delete(self, *keys: str) -> int:
         """Delete keys from cache"""
         try:
@@ -382,17 +451,23 @@ class RedisCache:
     
     async def clear_pattern(self, pattern: str) -> int:
         """Delete all keys matching pattern"""
+        # SCAN in large pages and UNLINK in batches, so neither the scan nor
+        # the frees block the server on a big keyspace
+        deleted = 0
         try:
             keys = []
-            async for key in self.redis.scan_iter(match=pattern):
+            async for key in self.redis.scan_iter(match=pattern, count=self.SCAN_COUNT):
                 keys.append(key)
+                if len(keys) >= self.PIPELINE_BATCH_SIZE:
+                    deleted += await self.redis.unlink(*keys)
+                    keys.clear()
             
             if keys:
-                return await self.redis.delete(*keys)
-            return 0
+                deleted += await self.redis.unlink(*keys)
+            return deleted
         except RedisError as e:
             logger.error(f"Redis clear pattern error: {e}")
-            return 0
+            return deleted
     
     async def get_info(self) -> Dict[str, Any]:
         """Get Redis server info"""
@@ -412,18 +487,43 @@ class RedisCache:
     def _serialize(self, value: Any) -> bytes:
         """Serialize value for storage"""
         if isinstance(value, (str, int, float, bool)):
-            return json.dumps(value).encode()
+            if _is_json_native(value):
+                try:
+                    return orjson.dumps(value)
+                except TypeError:
+                    # Integers beyond 64 bits - fall through to pickle
+                    pass
         elif isinstance(value, UUID):
             return str(value).encode()
-        else:
-            # Use pickle for complex objects
-            return pickle.dumps(value)
+        elif isinstance(value, (dict, list)) and _is_json_native(value):
+            # msgpack and orjson would silently turn datetimes, UUIDs, tuples
+            # and dataclasses into strings/lists; only JSON types round-trip.
+            # msgpack is more compact than JSON for proxy records
+            if msgpack is not None:
+                try:
+                    return self.MSGPACK_PREFIX + msgpack.packb(value, use_bin_type=True)
+                except (TypeError, ValueError, OverflowError):
+                    pass
+            try:
+                return orjson.dumps(value)
+            except TypeError:
+                # Out-of-range integers - fall through to pickle
+                pass
+        # Use pickle for complex objects
+        return pickle.dumps(value)
     
     def _deserialize(self, value: bytes) -> Any:
         """Deserialize value from storage"""
+        if msgpack is not None and value[:1] == self.MSGPACK_PREFIX:
+            try:
+                return msgpack.unpackb(value[1:], raw=False, strict_map_key=False)
+            except Exception as e:
+                logger.error(f"msgpack decode error: {e}")
+                return None
+        
         try:
             # Try JSON first
-            return json.loads(value.decode())
+            return orjson.loads(value)
         except:
             try:
                 # Fall back to pickle
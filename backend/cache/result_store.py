@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Persistent Result Store for ProxyAssessmentTool
+Disk-backed cache of lookup and probe results for warm reruns
+"""
+
+import logging
+import shelve
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentResultStore:
+    """Shelve-backed key/value store with per-entry expiry"""
+    
+    # Default TTL for stored results
+    RESULT_TTL = timedelta(days=1)
+    
+    def __init__(self, path: str = '.proxycache', ttl: Optional[timedelta] = None):
+        """
+        Open (or create) the store
+        
+        Args:
+            path: Shelve file path (the dbm backend may add a suffix)
+            ttl: How long entries stay valid
+        """
+        self.path = path
+        self.ttl = ttl or self.RESULT_TTL
+        self._shelf = shelve.open(path)
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a stored value, or None if missing or expired"""
+        try:
+            entry = self._shelf.get(key)
+        except Exception as e:
+            # Unpicklable entry from an older schema - treat as a miss
+            logger.debug(f"Result store read failed for {key}: {e}")
+            return None
+        
+        if entry is None:
+            return None
+        
+        value, stored_at = entry
+        if datetime.utcnow() - stored_at >= self.ttl:
+            del self._shelf[key]
+            return None
+        
+        return value
+    
+    def set(self, key: str, value: Any):
+        """Store a value"""
+        self._shelf[key] = (value, datetime.utcnow())
+    
+    def close(self):
+        """Flush and close the underlying shelf"""
+        self._shelf.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
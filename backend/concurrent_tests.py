@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Concurrent runner for the phase test scripts
+Runs independent test coroutines together and replays their output in order
+"""
+
+import asyncio
+import contextvars
+import io
+import sys
+from typing import Awaitable, Callable, Collection, List, Sequence, Tuple
+
+# Per-task output buffer so concurrently running tests don't interleave
+_task_output: contextvars.ContextVar = contextvars.ContextVar('task_output', default=None)
+
+
+class _TaskLocalStdout:
+    """stdout proxy that writes to the current task's buffer if it has one"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def write(self, text):
+        buffer = _task_output.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+
+async def run_buffered(test: Callable[[], Awaitable[bool]]) -> Tuple[bool, str]:
+    """Run a test coroutine function, capturing everything it prints"""
+    buffer = io.StringIO()
+    _task_output.set(buffer)
+    try:
+        return await test(), buffer.getvalue()
+    finally:
+        _task_output.set(None)
+
+
+async def run_live(test: Callable[[], Awaitable[bool]]) -> Tuple[bool, str]:
+    """Run a test coroutine function, letting its output through as it prints"""
+    return await test(), ''
+
+
+async def run_concurrently(tests: Sequence[Tuple[str, Callable[[], Awaitable[bool]]]],
+                           live: Collection[str] = ()) -> List[Tuple[str, bool]]:
+    """
+    Run (name, test) pairs concurrently, then print each test's output in order
+    
+    Tests named in `live` (meant for one test with progress output) print
+    straight to stdout while the rest are buffered and replayed afterwards.
+    Returns (name, passed) pairs; a test that raises counts as failed
+    """
+    stdout = sys.stdout
+    sys.stdout = _TaskLocalStdout(stdout)
+    try:
+        results = await asyncio.gather(
+            *(run_live(test) if name in live else run_buffered(test) for name, test in tests),
+            return_exceptions=True
+        )
+    finally:
+        sys.stdout = stdout
+    
+    test_results = []
+    for (test_name, _), result in zip(tests, results):
+        if isinstance(result, Exception):
+            print(f"\n❌ {test_name} crashed: {result}")
+            test_results.append((test_name, False))
+        else:
+            passed, output = result
+            sys.stdout.write(output)
+            test_results.append((test_name, passed))
+    
+    return test_results
@@ -6,12 +6,13 @@ Handles database connections, transactions, and queries
 
 import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID, uuid4
 
 from sqlalchemy import create_engine, select, update, delete, and_, or_, func, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, selectinload, joinedload
 from sqlalchemy.pool import NullPool, QueuePool
@@ -29,7 +30,8 @@ logger = logging.getLogger(__name__)
 class DatabaseService:
     """Production-grade database service with async support"""
     
-    def __init__(self, database_url: str, pool_size: int = 20, max_overflow: int = 10):
+    def __init__(self, database_url: str, pool_size: int = 20, max_overflow: int = 10,
+                 pool_warm_size: int = 10):
         """
         Initialize database service
         
@@ -37,6 +39,7 @@ class DatabaseService:
             database_url: PostgreSQL connection URL
             pool_size: Connection pool size
             max_overflow: Maximum overflow connections
+            pool_warm_size: Connections to open up front in initialize()
         """
         # Convert to async URL
         if database_url.startswith('postgresql://'):
@@ -53,6 +56,7 @@ class DatabaseService:
             pool_recycle=3600,   # Recycle connections after 1 hour
             echo=False           # Set to True for SQL debugging
         )
+        self.pool_warm_size = min(pool_warm_size, pool_size)
         
         # Create session factory
         self.async_session = async_sessionmaker(
@@ -69,8 +73,26 @@ class DatabaseService:
         """Initialize database (create tables if needed)"""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+        await self._warm_pool()
         logger.info("Database initialized")
     
+    async def _warm_pool(self):
+        """Open pool_warm_size connections so the first concurrent burst skips connection setup"""
+        # Hold every connection open at once, otherwise the pool just hands
+        # the same connection back to each checkout
+        async with AsyncExitStack() as stack:
+            await asyncio.gather(*(
+                self._warm_connection(stack)
+                for _ in range(self.pool_warm_size)
+            ))
+    
+    async def _warm_connection(self, stack: AsyncExitStack):
+        """Check out a connection and prepare the hot statements on it"""
+        conn = await stack.enter_async_context(self.engine.connect())
+        # asyncpg caches prepared statements per connection, keyed by SQL text,
+        # so one dummy lookup spares the first real upsert its prepare round trip
+        await conn.execute(self._proxy_lookup_stmt('0.0.0.0', 0, ProxyProtocol.HTTP))
+    
     async def close(self):
         """Close database connections"""
         await self.engine.dispose()
@@ -106,14 +128,7 @@ class DatabaseService:
         """
         async with self.session() as session:
             # Check if proxy exists
-            stmt = select(Proxy).where(
-                and_(
-                    Proxy.ip == ip,
-                    Proxy.port == port,
-                    Proxy.protocol == protocol
-                )
-            )
-            result = await session.execute(stmt)
+            result = await session.execute(self._proxy_lookup_stmt(ip, port, protocol))
             proxy = result.scalar_one_or_none()
             
             if proxy:
@@ -144,6 +159,56 @@ class DatabaseService:
             await session.commit()
             return proxy
     
+    async def bulk_upsert_proxies(self, rows: List[Dict[str, Any]]) -> List[UUID]:
+        """
+        Insert or update many proxy records in a single statement
+        
+        Args:
+            rows: Proxy column dicts with ip, port and protocol; every row
+                  must carry the same keys
+        
+        Returns:
+            IDs of the inserted or updated proxies, one per distinct
+            (ip, port, protocol)
+        """
+        if not rows:
+            return []
+        
+        # PostgreSQL rejects an ON CONFLICT DO UPDATE that touches a row twice,
+        # so merge duplicates first; later non-None values win, as they would
+        # across successive upsert_proxy calls
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for row in rows:
+            key = (row['ip'], row['port'], row['protocol'])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(row)
+            else:
+                existing.update((k, v) for k, v in row.items() if v is not None)
+        rows = list(merged.values())
+        
+        stmt = pg_insert(Proxy).values(rows)
+        
+        # Same semantics as upsert_proxy: bump the sighting, keep existing
+        # values where the new row has none
+        update_columns = {
+            key: func.coalesce(stmt.excluded[key], Proxy.__table__.c[key])
+            for key in rows[0]
+            if key not in ('ip', 'port', 'protocol')
+        }
+        stmt = stmt.on_conflict_do_update(
+            constraint='unique_proxy',
+            set_={
+                **update_columns,
+                'last_seen_at': func.current_timestamp(),
+                'times_seen': Proxy.times_seen + 1
+            }
+        ).returning(Proxy.id)
+        
+        async with self.session() as session:
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+    
     async def get_proxy(self, proxy_id: UUID) -> Optional[Proxy]:
         """Get proxy by ID"""
         async with self.session() as session:
@@ -457,6 +522,17 @@ class DatabaseService:
     
     # Private helper methods
     
+    @staticmethod
+    def _proxy_lookup_stmt(ip: str, port: int, protocol: ProxyProtocol):
+        """Select a proxy by its unique (ip, port, protocol) key"""
+        return select(Proxy).where(
+            and_(
+                Proxy.ip == ip,
+                Proxy.port == port,
+                Proxy.protocol == protocol
+            )
+        )
+    
     async def _get_or_create_source(self, session: AsyncSession, name: str) -> ProxySource:
         """Get or create proxy source"""
         stmt = select(ProxySource).where(ProxySource.name == name)
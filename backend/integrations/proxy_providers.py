@@ -510,14 +510,23 @@ class ProxyProviderManager:
         self.usage_cache: Dict[str, UsageStats] = {}
         self._usage_update_interval = timedelta(minutes=5)
         self._last_usage_update: Dict[str, datetime] = {}
+        self.packages_cache: Optional[Dict[str, List[ProxyPackage]]] = None
+        self._packages_update_interval = timedelta(seconds=60)
+        self._last_packages_update: Optional[datetime] = None
     
     def register_provider(self, name: str, provider: ProxyProvider):
         """Register a proxy provider"""
         self.providers[name.lower()] = provider
+        self.packages_cache = None
         logger.info(f"Registered proxy provider: {name}")
     
-    async def get_all_packages(self) -> Dict[str, List[ProxyPackage]]:
-        """Get packages from all providers"""
+    async def get_all_packages(self, force_refresh: bool = False) -> Dict[str, List[ProxyPackage]]:
+        """Get packages from all providers with caching"""
+        # Check cache
+        if not force_refresh and self.packages_cache is not None:
+            if (datetime.utcnow() - self._last_packages_update) < self._packages_update_interval:
+                return self.packages_cache
+        
         all_packages = {}
         
         for name, provider in self.providers.items():
@@ -529,6 +538,10 @@ class ProxyProviderManager:
                 logger.error(f"Error fetching packages from {name}: {e}")
                 all_packages[name] = []
         
+        # Update cache
+        self.packages_cache = all_packages
+        self._last_packages_update = datetime.utcnow()
+        
         return all_packages
     
     async def find_best_package(self,
@@ -10,7 +10,7 @@ import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterable, Sequence
 from enum import Enum
 import logging
 import uuid
@@ -72,6 +72,11 @@ class SIEMEvent:
     correlation_id: Optional[str] = None
     trace_id: Optional[str] = None
     
+    @classmethod
+    def from_rows(cls, fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> List['SIEMEvent']:
+        """Build events from value tuples matching the given field names"""
+        return [cls(**dict(zip(fields, row))) for row in rows]
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         data = asdict(self)
@@ -140,6 +145,7 @@ class SIEMConnector(ABC):
         self._buffer_size = config.get('buffer_size', 1000)
         self._flush_interval = config.get('flush_interval', 60)
         self._last_flush = datetime.utcnow()
+        self._enrichment_fields: Optional[Dict[str, Any]] = None
     
     @abstractmethod
     async def connect(self) -> bool:
@@ -184,10 +190,16 @@ class SIEMConnector(ABC):
     
     def enrich_event(self, event: SIEMEvent) -> SIEMEvent:
         """Enrich event with common fields"""
-        event.attributes['siem_connector'] = self.name
-        event.attributes['environment'] = self.config.get('environment', 'production')
-        event.attributes['region'] = self.config.get('region', 'us-east-1')
-        event.attributes['instance_id'] = self.config.get('instance_id', 'default')
+        # Fields only depend on connector config, so build them once
+        if self._enrichment_fields is None:
+            self._enrichment_fields = {
+                'siem_connector': self.name,
+                'environment': self.config.get('environment', 'production'),
+                'region': self.config.get('region', 'us-east-1'),
+                'instance_id': self.config.get('instance_id', 'default')
+            }
+        
+        event.attributes.update(self._enrichment_fields)
         
         return event
 
@@ -696,6 +708,13 @@ class SIEMManager:
         """Queue event for sending"""
         await self._event_queue.put(event)
     
+    async def send_events(self, events: List[SIEMEvent]):
+        """Queue multiple events for sending in one call"""
+        # Connectors buffer queued events and ship them via send_batch,
+        # so a bulk enqueue ends up as a single HEC/_bulk request
+        for event in events:
+            self._event_queue.put_nowait(event)
+    
     async def _event_worker(self):
         """Background worker to process events"""
         while self._running:
@@ -8,7 +8,7 @@ import asyncio
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any, Union
 import logging
 from dataclasses import dataclass
 import json
@@ -24,7 +24,7 @@ import joblib
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ProxyFeatures:
     """Features used for ML prediction"""
     # Network features
@@ -85,6 +85,55 @@ class ProxyFeatures:
             float(self.day_of_week),
             float(self.is_weekend)
         ])
+    
+    def to_vector(self) -> np.ndarray:
+        """Convert to a contiguous float32 vector, the dtype the model consumes"""
+        # Not cached: a 20-element astype is cheaper than memoizing on a frozen instance
+        return self.to_array().astype(np.float32)
+
+
+@dataclass
+class ProxyFeaturesBatch:
+    """
+    Column-oriented batch of ProxyFeatures
+    
+    Numeric features sit in one (n, 20) float32 matrix and the categorical
+    fields in parallel arrays, so a batch reaches the model without walking
+    every attribute of every row
+    """
+    numeric: np.ndarray
+    protocol: np.ndarray
+    country_code: np.ndarray
+    asn: np.ndarray
+    
+    @classmethod
+    def from_list(cls, features_list: Sequence[ProxyFeatures]) -> 'ProxyFeaturesBatch':
+        """Build a batch, converting each distinct feature set only once"""
+        if not features_list:
+            raise ValueError("ProxyFeaturesBatch needs at least one row")
+        
+        # Rows repeat often (one sample scored many times); gather by index
+        unique: Dict[ProxyFeatures, int] = {}
+        rows = np.fromiter(
+            (unique.setdefault(f, len(unique)) for f in features_list),
+            dtype=np.intp,
+            count=len(features_list)
+        )
+        distinct = list(unique)
+        
+        return cls(
+            numeric=np.stack([f.to_vector() for f in distinct])[rows],
+            protocol=np.array([f.protocol for f in distinct])[rows],
+            country_code=np.array([f.country_code for f in distinct])[rows],
+            asn=np.array([f.asn for f in distinct])[rows]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.numeric)
+    
+    def to_matrix(self) -> np.ndarray:
+        """Numeric model input, shape (n, 20)"""
+        return self.numeric
 
 
 class ProxyQualityPredictor:
@@ -93,8 +142,12 @@ class ProxyQualityPredictor:
     Uses deep learning with attention mechanisms
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, jit_compile: bool = True):
         self.model: Optional[Model] = None
+        # XLA-compile the inference call; turned off if compilation fails
+        self.jit_compile = jit_compile
+        self._call_fn = None
+        self._call_model: Optional[Model] = None
         self.scaler: Optional[StandardScaler] = None
         self.label_encoders = {}
         self.feature_names = []
@@ -293,10 +346,7 @@ class ProxyQualityPredictor:
         X_asn = self._encode_asn(features.asn)
         
         # Predict
-        predictions = self.model.predict(
-            [X_numeric, X_protocol, X_country, X_asn],
-            verbose=0
-        )
+        predictions = self._forward([X_numeric, X_protocol, X_country, [X_asn]])
         
         return {
             'quality_score': float(predictions[0][0]),
@@ -305,29 +355,31 @@ class ProxyQualityPredictor:
             'recommendation': self._get_recommendation(predictions)
         }
     
-    async def batch_predict(self, features_list: List[ProxyFeatures]) -> List[Dict[str, float]]:
+    async def batch_predict(self,
+                            features: Union[List[ProxyFeatures], ProxyFeaturesBatch]
+                            ) -> List[Dict[str, float]]:
         """
         Batch prediction for efficiency
         """
-        if not features_list:
+        if not len(features):
             return []
         
+        if not isinstance(features, ProxyFeaturesBatch):
+            features = ProxyFeaturesBatch.from_list(features)
+        
         # Prepare batch inputs
-        X_numeric = self.scaler.transform([f.to_array() for f in features_list])
-        X_protocol = self.label_encoders['protocol'].transform([f.protocol for f in features_list])
-        X_country = self.label_encoders['country'].transform([f.country_code for f in features_list])
-        X_asn = np.array([self._encode_asn(f.asn) for f in features_list])
+        X_numeric = self.scaler.transform(features.to_matrix())
+        X_protocol = self.label_encoders['protocol'].transform(features.protocol)
+        X_country = self.label_encoders['country'].transform(features.country_code)
+        asns, asn_rows = np.unique(features.asn, return_inverse=True)
+        X_asn = np.array([self._encode_asn(asn) for asn in asns])[asn_rows]
         
         # Batch predict
-        predictions = self.model.predict(
-            [X_numeric, X_protocol, X_country, X_asn],
-            batch_size=32,
-            verbose=0
-        )
+        predictions = self._forward([X_numeric, X_protocol, X_country, X_asn])
         
         # Format results
         results = []
-        for i in range(len(features_list)):
+        for i in range(len(features)):
             results.append({
                 'quality_score': float(predictions[0][i]),
                 'expected_lifetime_hours': float(predictions[1][i]),
@@ -341,6 +393,64 @@ class ProxyQualityPredictor:
         
         return results
     
+    def _forward(self, inputs: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run inference through a traced, XLA-compiled model call
+        
+        model.predict() builds a data adapter and dataset per call, which
+        dominates for the small batches served here
+        """
+        if self._call_fn is None or self._call_model is not self.model:
+            model = self.model
+            # Batch dimension left open so one trace serves every batch size
+            signature = [[
+                tf.TensorSpec((None, model.inputs[0].shape[-1]), tf.float32),
+                *(tf.TensorSpec((None, 1), tf.int32) for _ in model.inputs[1:])
+            ]]
+            self._call_fn = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=signature,
+                jit_compile=self.jit_compile
+            )
+            self._call_model = model
+        
+        outputs = self._call_fn([
+            tf.constant(np.asarray(inputs[0], dtype=np.float32)),
+            *(tf.constant(np.asarray(x, dtype=np.int32).reshape(-1, 1)) for x in inputs[1:])
+        ])
+        return [output.numpy() for output in outputs]
+    
+    def warm_up(self):
+        """
+        Trace and compile the inference call with a dummy batch
+        
+        Keeps the one-off tracing and XLA compilation cost off the first
+        real prediction. If XLA compilation fails, inference falls back to
+        a plain traced call; failures here never unload the model
+        """
+        if self.model is None:
+            return
+        
+        dummy = [
+            np.zeros((1, self.model.inputs[0].shape[-1]), dtype=np.float32),
+            *(np.zeros(1, dtype=np.int32) for _ in self.model.inputs[1:])
+        ]
+        try:
+            self._forward(dummy)
+            return
+        except Exception as e:
+            if not self.jit_compile:
+                logger.warning(f"Model warm-up failed: {e}")
+                return
+            logger.warning(f"XLA compilation failed, falling back to non-XLA inference: {e}")
+        
+        self.jit_compile = False
+        self._call_fn = None
+        try:
+            self._forward(dummy)
+        except Exception as e:
+            logger.warning(f"Model warm-up failed: {e}")
+    
     def _prepare_training_data(self, df: pd.DataFrame) -> Tuple[np.ndarray, ...]:
         """
         Prepare training data with feature engineering
@@ -431,6 +541,10 @@ class ProxyQualityPredictor:
             logger.info(f"Model loaded from {self.model_path}")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
+            return
+        
+        # Separate from loading: a warm-up failure only costs first-call latency
+        self.warm_up()
     
     def _save_preprocessors(self):
         """Save scaler and encoders"""
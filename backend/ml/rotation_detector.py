@@ -7,17 +7,65 @@ Identifies rotating proxies and residential proxy pools
 import asyncio
 import hashlib
 import ipaddress
-from collections import defaultdict, deque
+import math
+from collections import Counter, defaultdict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Any, Union
 import logging
 from dataclasses import dataclass, field
 import numpy as np
-from scipy.stats import entropy
 import jellyfish  # For string similarity
 
 logger = logging.getLogger(__name__)
 
+# Number of recent exit IPs the random-rotation entropy is computed over
+RANDOM_WINDOW = 50
+
+
+def _xlogx(x: int) -> float:
+    return x * math.log(x) if x > 0 else 0.0
+
+
+class IPWindow:
+    """
+    Sliding window of recent exit IPs with incrementally maintained entropy
+    
+    Tracks sum(c * log c) over the per-IP counts, so each push is O(1) and
+    entropy = log(n) - sum(c * log c) / n needs no pass over the window
+    """
+    
+    def __init__(self, size: int):
+        self.ips: deque = deque(maxlen=size)
+        self.counts: Counter = Counter()
+        self._count_log_sum = 0.0
+    
+    def push(self, ip: str):
+        """Add an IP, evicting the oldest one if the window is full"""
+        if len(self.ips) == self.ips.maxlen:
+            self._adjust(self.ips[0], -1)
+        self.ips.append(ip)
+        self._adjust(ip, 1)
+    
+    def extend(self, ips: Sequence[str]):
+        for ip in ips:
+            self.push(ip)
+    
+    def _adjust(self, ip: str, delta: int):
+        count = self.counts[ip]
+        self._count_log_sum += _xlogx(count + delta) - _xlogx(count)
+        if count + delta:
+            self.counts[ip] = count + delta
+        else:
+            del self.counts[ip]
+    
+    @property
+    def entropy(self) -> float:
+        """Shannon entropy (nats) of the IP distribution in the window"""
+        n = len(self.ips)
+        if not n:
+            return 0.0
+        return max(0.0, math.log(n) - self._count_log_sum / n)
+
 
 @dataclass
 class ProxySession:
@@ -71,6 +119,7 @@ class ProxyRotationDetector:
         # Session tracking
         self.sessions: Dict[str, ProxySession] = {}
         self.ip_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self.ip_windows: Dict[str, IPWindow] = defaultdict(lambda: IPWindow(RANDOM_WINDOW))
         
         # Pattern detection
         self.rotation_patterns: Dict[str, List[RotationPattern]] = defaultdict(list)
@@ -102,29 +151,14 @@ class ProxyRotationDetector:
         """
         session_key = f"{proxy_ip}:{proxy_port}"
         current_time = datetime.utcnow()
-        
-        # Update or create session
-        if session_key not in self.sessions:
-            self.sessions[session_key] = ProxySession(
-                ip=proxy_ip,
-                port=proxy_port,
-                first_seen=current_time,
-                last_seen=current_time
-            )
-        
-        session = self.sessions[session_key]
+        session = self._get_session(session_key, proxy_ip, proxy_port, current_time)
         
         # Track changes
         prev_exit_count = len(session.exit_ips)
         session.exit_ips.add(exit_ip)
         session.last_seen = current_time
         session.total_requests += 1
-        
-        if headers.get('User-Agent'):
-            session.user_agents.add(headers['User-Agent'])
-        
-        if tls_fingerprint:
-            session.tls_fingerprints.add(tls_fingerprint)
+        self._track_client(session, headers, tls_fingerprint)
         
         # Track IP history with timestamp
         self.ip_history[session_key].append({
@@ -133,13 +167,97 @@ class ProxyRotationDetector:
             'asn': asn,
             'location': location
         })
+        self.ip_windows[session_key].push(exit_ip)
         
         # Detect rotation
         rotation_detected = len(session.exit_ips) > prev_exit_count
         
+        return await self._build_analysis(session_key, session, exit_ip, rotation_detected)
+    
+    async def analyze_batch(self,
+                          proxy_ip: str,
+                          proxy_port: int,
+                          exit_ips: Union[Sequence[str], np.ndarray],
+                          headers: Dict[str, str],
+                          tls_fingerprint: Optional[str] = None,
+                          asn: Union[str, Sequence[Optional[str]], None] = None,
+                          location: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Analyze a run of requests through one proxy in a single pass
+        
+        exit_ips may be dotted strings or a uint32 array of IPv4 addresses;
+        asn may be one value for the whole batch or one per request. Session
+        state is updated in bulk and patterns are detected once at the end;
+        rotation_detected reports whether the batch added any new exit IP.
+        All requests in a batch share one timestamp.
+        """
+        if isinstance(exit_ips, np.ndarray):
+            exit_ips = [str(ipaddress.IPv4Address(int(ip))) for ip in exit_ips]
+        else:
+            exit_ips = list(exit_ips)
+        
+        if not exit_ips:
+            raise ValueError("analyze_batch() needs at least one exit IP")
+        
+        if asn is None or isinstance(asn, str):
+            asns = [asn] * len(exit_ips)
+        else:
+            asns = list(asn)
+        
+        session_key = f"{proxy_ip}:{proxy_port}"
+        current_time = datetime.utcnow()
+        session = self._get_session(session_key, proxy_ip, proxy_port, current_time)
+        
+        # Track changes
+        prev_exit_count = len(session.exit_ips)
+        session.exit_ips.update(exit_ips)
+        session.last_seen = current_time
+        session.total_requests += len(exit_ips)
+        self._track_client(session, headers, tls_fingerprint)
+        
+        self.ip_history[session_key].extend(
+            {
+                'exit_ip': exit_ip,
+                'timestamp': current_time,
+                'asn': entry_asn,
+                'location': location
+            }
+            for exit_ip, entry_asn in zip(exit_ips, asns)
+        )
+        self.ip_windows[session_key].extend(exit_ips)
+        
+        rotation_detected = len(session.exit_ips) > prev_exit_count
+        
+        return await self._build_analysis(session_key, session, exit_ips[-1], rotation_detected)
+    
+    def _get_session(self, session_key: str, proxy_ip: str, proxy_port: int,
+                     current_time: datetime) -> ProxySession:
+        """Get or create the tracked session for a proxy"""
+        if session_key not in self.sessions:
+            self.sessions[session_key] = ProxySession(
+                ip=proxy_ip,
+                port=proxy_port,
+                first_seen=current_time,
+                last_seen=current_time
+            )
+        
+        return self.sessions[session_key]
+    
+    def _track_client(self, session: ProxySession, headers: Dict[str, str],
+                      tls_fingerprint: Optional[str]):
+        """Record client-side identifiers seen through the session"""
+        if headers.get('User-Agent'):
+            session.user_agents.add(headers['User-Agent'])
+        
+        if tls_fingerprint:
+            session.tls_fingerprints.add(tls_fingerprint)
+    
+    async def _build_analysis(self, session_key: str, session: ProxySession,
+                              exit_ip: str, rotation_detected: bool) -> Dict[str, Any]:
+        """Build the analysis result for the session's current state"""
         # Analyze patterns
         analysis = {
-            'proxy': f"{proxy_ip}:{proxy_port}",
+            'proxy': session_key,
             'exit_ip': exit_ip,
             'rotation_detected': rotation_detected,
             'total_exit_ips': len(session.exit_ips),
@@ -184,7 +302,7 @@ class ProxyRotationDetector:
             patterns.append(sequential)
         
         # Random pattern detection
-        random_pattern = self._detect_random_pattern(history)
+        random_pattern = self._detect_random_pattern(history, self.ip_windows[session_key])
         if random_pattern:
             patterns.append(random_pattern)
         
@@ -242,22 +360,17 @@ class ProxyRotationDetector:
         
         return None
     
-    def _detect_random_pattern(self, history: List[Dict]) -> Optional[RotationPattern]:
+    def _detect_random_pattern(self, history: List[Dict],
+                               window: IPWindow) -> Optional[RotationPattern]:
         """
-        Detect random rotation pattern using entropy
+        Detect random rotation pattern using entropy over the recent IP window
         """
-        ips = [h['exit_ip'] for h in history[-50:]]
+        ip_counts = window.counts
         
-        if len(set(ips)) < self.pool_min_size:
+        if len(ip_counts) < self.pool_min_size:
             return None
         
-        # Calculate entropy
-        ip_counts = defaultdict(int)
-        for ip in ips:
-            ip_counts[ip] += 1
-        
-        probabilities = np.array(list(ip_counts.values())) / len(ips)
-        ip_entropy = entropy(probabilities)
+        ip_entropy = window.entropy
         
         # High entropy indicates randomness
         if ip_entropy > np.log(len(ip_counts)) * 0.8:
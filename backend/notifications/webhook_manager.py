@@ -7,7 +7,6 @@ Enterprise-grade webhook delivery with retries and security
 import asyncio
 import hashlib
 import hmac
-import json
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable
@@ -17,12 +16,16 @@ import logging
 from uuid import uuid4
 
 import httpx
+import orjson
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 import backoff
 
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by all delivery workers
+DELIVERY_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
 
 class WebhookEvent(str, Enum):
     """Webhook event types"""
@@ -101,6 +104,10 @@ class WebhookPayload:
             'data': self.data,
             'metadata': self.metadata
         }
+    
+    def to_json(self) -> bytes:
+        """Serialize to the request body sent to endpoints"""
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_NON_STR_KEYS)
 
 
 @dataclass
@@ -109,6 +116,7 @@ class WebhookDelivery:
     id: str = field(default_factory=lambda: str(uuid4()))
     endpoint_id: str = ""
     payload: WebhookPayload = field(default_factory=WebhookPayload)
+    body: bytes = b""  # Serialized payload, shared by every delivery of an event
     attempt: int = 0
     status: str = "pending"  # pending, success, failed
     response_code: Optional[int] = None
@@ -144,11 +152,20 @@ class WebhookManager:
         # Background tasks
         self.workers: List[asyncio.Task] = []
         self.running = False
+        
+        # HTTP client, created in start()
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Keyed HMAC per secret; copying one skips re-deriving the padded keys
+        self._hmac_keys: Dict[str, hmac.HMAC] = {}
     
     async def start(self, num_workers: int = 5):
         """Start webhook delivery workers"""
         self.running = True
         
+        # One pooled client lets every worker reuse keep-alive connections
+        self._client = httpx.AsyncClient(limits=DELIVERY_LIMITS)
+        
         # Start delivery workers
         for i in range(num_workers):
             worker = asyncio.create_task(self._delivery_worker(f"worker-{i}"))
@@ -169,6 +186,11 @@ class WebhookManager:
             worker.cancel()
         
         await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers.clear()
+        
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         logger.info("Stopped webhook delivery workers")
     
     def register_endpoint(self, endpoint: WebhookEndpoint) -> str:
@@ -177,6 +199,8 @@ class WebhookManager:
             endpoint.id = str(uuid4())
         
         self.endpoints[endpoint.id] = endpoint
+        if endpoint.secret:
+            self._hmac_for(endpoint.secret)
         logger.info(f"Registered webhook endpoint: {endpoint.name} ({endpoint.id})")
         
         return endpoint.id
@@ -210,6 +234,7 @@ class WebhookManager:
         })
         
         delivery_ids = []
+        body: Optional[bytes] = None
         
         # Find matching endpoints
         for endpoint in self.endpoints.values():
@@ -221,10 +246,15 @@ class WebhookManager:
                 if self._apply_filters(endpoint, payload):
                     # Check rate limit
                     if self._check_rate_limit(endpoint.id):
+                        # Serialize once, on the first matching endpoint
+                        if body is None:
+                            body = payload.to_json()
+                        
                         # Create delivery
                         delivery = WebhookDelivery(
                             endpoint_id=endpoint.id,
-                            payload=payload
+                            payload=payload,
+                            body=body
                         )
                         
                         self.deliveries[delivery.id] = delivery
@@ -249,22 +279,21 @@ class WebhookManager:
     
     async def _delivery_worker(self, worker_id: str):
         """Worker to process webhook deliveries"""
-        async with httpx.AsyncClient() as client:
-            while self.running:
-                try:
-                    # Get delivery from queue
-                    delivery = await asyncio.wait_for(
-                        self.delivery_queue.get(),
-                        timeout=1.0
-                    )
-                    
-                    # Deliver webhook
-                    await self._deliver_webhook(client, delivery)
-                    
-                except asyncio.TimeoutError:
-                    continue
-                except Exception as e:
-                    logger.error(f"Delivery worker {worker_id} error: {e}")
+        while self.running:
+            try:
+                # Get delivery from queue
+                delivery = await asyncio.wait_for(
+                    self.delivery_queue.get(),
+                    timeout=1.0
+                )
+                
+                # Deliver webhook
+                await self._deliver_webhook(self._client, delivery)
+                
+            except asyncio.TimeoutError:
+                continue
+            except Exception as e:
+                logger.error(f"Delivery worker {worker_id} error: {e}")
     
     async def _retry_worker(self):
         """Worker to handle retries"""
@@ -311,8 +340,7 @@ class WebhookManager:
         
         try:
             # Prepare payload
-            payload_dict = delivery.payload.to_dict()
-            payload_json = json.dumps(payload_dict)
+            body = delivery.body or delivery.payload.to_json()
             
             # Prepare headers
             headers = {
@@ -326,13 +354,13 @@ class WebhookManager:
             
             # Sign payload if required
             if endpoint.sign_payload and endpoint.secret:
-                signature = self._sign_payload(payload_json, endpoint.secret)
+                signature = self._sign_payload(body, endpoint.secret)
                 headers['X-Webhook-Signature'] = signature
             
             # Send request
             response = await client.post(
                 endpoint.url,
-                content=payload_json,
+                content=body,
                 headers=headers,
                 timeout=endpoint.timeout,
                 follow_redirects=True
@@ -371,17 +399,21 @@ class WebhookManager:
             else:
                 delivery.status = "failed"
     
-    def _sign_payload(self, payload: str, secret: str) -> str:
+    def _sign_payload(self, payload: bytes, secret: str) -> str:
         """
         Sign webhook payload using HMAC-SHA256
         """
-        signature = hmac.new(
-            secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        mac = self._hmac_for(secret).copy()
+        mac.update(payload)
         
-        return f"sha256={signature}"
+        return f"sha256={mac.hexdigest()}"
+    
+    def _hmac_for(self, secret: str) -> hmac.HMAC:
+        """Get the keyed HMAC-SHA256 template for a secret"""
+        mac = self._hmac_keys.get(secret)
+        if mac is None:
+            mac = self._hmac_keys[secret] = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        return mac
     
     def _generate_signing_key(self) -> str:
         """Generate random signing key"""
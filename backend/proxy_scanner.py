@@ -12,9 +12,11 @@ import struct
 import time
 import ipaddress
 import random
-from typing import List, Set, Dict, Optional, Tuple, AsyncIterator
+from array import array
+import numpy as np
+from typing import List, Set, Dict, Iterable, Optional, Tuple, AsyncIterator
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from collections import deque
 import json
@@ -23,6 +25,7 @@ from concurrent.futures import ThreadPoolExecutor
 import aiofiles
 from asyncio import Semaphore
 from asn_lookup import ASNLookupService, ASNInfo
+from cache.result_store import PersistentResultStore
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +34,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Government/military /8 ranges that are never scanned (simplified)
+GOVERNMENT_NETWORKS = tuple(
+    ipaddress.IPv4Network(f'{octet}.0.0.0/8') for octet in (11, 21, 22, 26, 28, 29, 30)
+)
+
+
+def build_range_table(networks) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge IPv4 networks into sorted, non-overlapping (starts, ends) arrays"""
+    spans = sorted(
+        (int(net.network_address), int(net.broadcast_address)) for net in networks
+    )
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    
+    starts = np.array([span[0] for span in merged], dtype=np.uint32)
+    ends = np.array([span[1] for span in merged], dtype=np.uint32)
+    return starts, ends
+
+
+def in_range_table(ip_int: int, table: Tuple[np.ndarray, np.ndarray]) -> bool:
+    """Binary-search an integer IPv4 address against a range table"""
+    starts, ends = table
+    idx = int(np.searchsorted(starts, ip_int, side='right')) - 1
+    return idx >= 0 and ip_int <= int(ends[idx])
+
+
+GOVERNMENT_RANGES = build_range_table(GOVERNMENT_NETWORKS)
+
+# Greeting reply signatures on the first 4 bytes, most specific first:
+# (magic, mask, protocol, confidence)
+PROTOCOL_SIGNATURES = (
+    (0x05000000, 0xFFFF0000, 'socks5', 1.0),  # No authentication required
+    (0x05020000, 0xFFFF0000, 'socks5', 0.9),  # Username/password required
+    (0x05000000, 0xFF000000, 'socks5', 0.8),  # Other auth method
+    (0x005A0000, 0xFFFF0000, 'socks4', 1.0),  # Request granted
+    (0x00000000, 0xFF000000, 'socks4', 0.7),  # Request denied
+    (0x48545450, 0xFFFFFFFF, 'http', 0.0),    # "HTTP" status line
+)
+
+# HTTP status codes from a CONNECT probe and their proxy confidence
+HTTP_PROXY_STATUS = {
+    b'200': 1.0,
+    b'407': 0.9,
+    # HTTP error codes suggest it's an HTTP server (possibly proxy)
+    b'400': 0.6, b'403': 0.6, b'404': 0.6,
+    b'500': 0.6, b'502': 0.6, b'503': 0.6,
+}
+
+
+def match_protocol_signature(response: bytes) -> Tuple[Optional[str], float]:
+    """Classify a greeting reply with one integer compare per signature"""
+    if len(response) < 2:
+        return None, 0.0
+    
+    tag = int.from_bytes(response[:4].ljust(4, b'\x00'), 'big')
+    for magic, mask, protocol, confidence in PROTOCOL_SIGNATURES:
+        if tag & mask == magic:
+            return protocol, confidence
+    
+    return None, 0.0
+
 
 @dataclass
 class ScanTarget:
@@ -45,6 +113,71 @@ class ScanTarget:
         return hash(f"{self.ip}:{self.port}")
 
 
+@dataclass
+class ScanTargetBatch:
+    """
+    Struct-of-arrays storage for many scan targets
+    ScanTarget objects are only materialized when iterated
+    """
+    ips: np.ndarray          # uint32 IPv4 addresses
+    ports: np.ndarray        # uint16
+    priorities: np.ndarray   # float32
+    source_codes: np.ndarray # int8 index into `sources`
+    sources: Tuple[str, ...] = ('manual',)
+    
+    @classmethod
+    def from_product(cls, ips: List[str], ports: List[int],
+                     priority: float = 1.0, source: str = 'manual') -> 'ScanTargetBatch':
+        """Build every ip x port combination, ports varying fastest"""
+        ip_ints = np.frombuffer(b''.join(socket.inet_aton(ip) for ip in ips), dtype='>u4')
+        count = len(ips) * len(ports)
+        return cls(
+            ips=np.repeat(ip_ints.astype(np.uint32), len(ports)),
+            ports=np.tile(np.asarray(ports, dtype=np.uint16), len(ips)),
+            priorities=np.full(count, priority, dtype=np.float32),
+            source_codes=np.zeros(count, dtype=np.int8),
+            sources=(source,)
+        )
+    
+    @classmethod
+    def from_iter(cls, rows: Iterable[Tuple[str, int, float, str]]) -> 'ScanTargetBatch':
+        """Build a batch from (ip, port, priority, source) rows in one pass"""
+        ips, ports, priorities, codes = array('I'), array('H'), array('f'), array('b')
+        sources: Dict[str, int] = {}
+        
+        for ip, port, priority, source in rows:
+            ips.append(int.from_bytes(socket.inet_aton(ip), 'big'))
+            ports.append(port)
+            priorities.append(priority)
+            codes.append(sources.setdefault(source, len(sources)))
+        
+        # array('I') is 4 bytes on every mainstream platform, but don't assume it
+        ip_array = np.frombuffer(ips, dtype=np.uint32) if ips.itemsize == 4 else np.array(ips, dtype=np.uint32)
+        return cls(
+            ips=ip_array,
+            ports=np.frombuffer(ports, dtype=np.uint16),
+            priorities=np.frombuffer(priorities, dtype=np.float32),
+            source_codes=np.frombuffer(codes, dtype=np.int8),
+            sources=tuple(sources) or ('manual',)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ips)
+    
+    def __iter__(self):
+        sources = self.sources
+        for ip, port, priority, code in zip(
+            self.ips.tolist(), self.ports.tolist(),
+            self.priorities.tolist(), self.source_codes.tolist()
+        ):
+            yield ScanTarget(
+                ip=socket.inet_ntoa(ip.to_bytes(4, 'big')),
+                port=port,
+                priority=priority,
+                source=sources[code]
+            )
+
+
 @dataclass 
 class ScanResult:
     """Result of a proxy scan"""
@@ -62,17 +195,16 @@ class ScanResult:
 class ProxyProtocolDetector:
     """Detects proxy protocols without port scanning"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[PersistentResultStore] = None):
         self.timeout = 5.0
         self.max_retries = 2
+        self.store = store
         
     async def detect_socks5(self, ip: str, port: int) -> Tuple[bool, float]:
         """
         Detect SOCKS5 proxy by sending proper handshake
         Returns (is_socks5, confidence_score)
         """
-        start_time = time.time()
-        
         try:
             # SOCKS5 handshake: Version(5) + Number of methods(1) + Method(0=no auth)
             handshake = b'\x05\x01\x00'
@@ -92,28 +224,13 @@ class ProxyProtocolDetector:
                 timeout=self.timeout
             )
             
-            response_time = time.time() - start_time
-            
-            if len(response) == 2 and response[0] == 0x05:
-                # Valid SOCKS5 response
-                if response[1] == 0x00:
-                    # No authentication required
-                    confidence = 1.0
-                elif response[1] == 0x02:
-                    # Username/password required
-                    confidence = 0.9
-                else:
-                    # Other auth method
-                    confidence = 0.8
-                
-                writer.close()
-                await writer.wait_closed()
-                
-                return True, confidence
-            
             writer.close()
             await writer.wait_closed()
             
+            protocol, confidence = match_protocol_signature(response)
+            if protocol == 'socks5':
+                return True, confidence
+            
         except asyncio.TimeoutError:
             logger.debug(f"SOCKS5 timeout for {ip}:{port}")
         except ConnectionRefusedError:
@@ -154,21 +271,14 @@ class ProxyProtocolDetector:
                 timeout=self.timeout
             )
             
-            if len(response) >= 2:
-                # Check if VN=0 and CD=90 (request granted)
-                if response[0] == 0x00 and response[1] == 0x5A:
-                    writer.close()
-                    await writer.wait_closed()
-                    return True, 1.0
-                elif response[0] == 0x00:
-                    # SOCKS4 response but request denied
-                    writer.close()
-                    await writer.wait_closed()
-                    return True, 0.7
-            
             writer.close()
             await writer.wait_closed()
             
+            # VN=0, CD=90 when granted; any other CD means denied
+            protocol, confidence = match_protocol_signature(response)
+            if protocol == 'socks4':
+                return True, confidence
+            
         except Exception as e:
             logger.debug(f"SOCKS4 detection error for {ip}:{port}: {str(e)}")
         
@@ -203,20 +313,15 @@ class ProxyProtocolDetector:
                 timeout=self.timeout
             )
             
-            response_str = response.decode('utf-8', errors='ignore')
-            
             writer.close()
             await writer.wait_closed()
             
-            # Check for proxy responses
-            if 'HTTP/' in response_str:
-                if '200 Connection established' in response_str:
-                    return True, 1.0
-                elif '407 Proxy Authentication Required' in response_str:
-                    return True, 0.9
-                elif any(code in response_str for code in ['400', '403', '404', '500', '502', '503']):
-                    # HTTP error codes suggest it's an HTTP server (possibly proxy)
-                    return True, 0.6
+            # Check for proxy responses ("HTTP/1.x NNN ...")
+            protocol, _ = match_protocol_signature(response)
+            if protocol == 'http':
+                confidence = HTTP_PROXY_STATUS.get(response[9:12])
+                if confidence is not None:
+                    return True, confidence
             
         except Exception as e:
             logger.debug(f"HTTP proxy detection error for {ip}:{port}: {str(e)}")
@@ -226,8 +331,25 @@ class ProxyProtocolDetector:
     async def detect_proxy(self, ip: str, port: int) -> ScanResult:
         """
         Detect if target is a proxy and determine type
+        Reuses a stored result for the same target when a store is configured
         """
-        start_time = time.time()
+        if self.store is None:
+            return await self._probe_proxy(ip, port)
+        
+        key = f"probe:{ip}:{port}"
+        result = self.store.get(key)
+        if result is None:
+            result = await self._probe_proxy(ip, port)
+            # Only positive detections are definitive; a negative may just be
+            # a timeout or refused connection, so it is re-probed next run
+            if result.is_proxy:
+                self.store.set(key, result)
+        
+        return result
+    
+    async def _probe_proxy(self, ip: str, port: int) -> ScanResult:
+        """Probe all protocols against a target"""
+        start_ns = time.perf_counter_ns()
         
         # Try each protocol in parallel
         tasks = [
@@ -238,7 +360,7 @@ class ProxyProtocolDetector:
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Process results
         detections = []
@@ -284,8 +406,8 @@ class ProxyProtocolDetector:
 class IntelligentTargetSelector:
     """Selects scanning targets intelligently"""
     
-    def __init__(self):
-        self.asn_service = ASNLookupService()
+    def __init__(self, store: Optional[PersistentResultStore] = None):
+        self.asn_service = ASNLookupService(store)
         
         self.common_proxy_ports = [
             1080,   # SOCKS
@@ -381,13 +503,15 @@ class IntelligentTargetSelector:
 class EthicalScanManager:
     """Manages ethical scanning with rate limiting and abuse prevention"""
     
-    def __init__(self, max_concurrent: int = 50, requests_per_second: float = 10.0):
+    def __init__(self, max_concurrent: int = 50, requests_per_second: float = 10.0,
+                 store: Optional[PersistentResultStore] = None):
         self.max_concurrent = max_concurrent
         self.semaphore = Semaphore(max_concurrent)
         self.rate_limiter = RateLimiter(requests_per_second)
         self.scan_log = deque(maxlen=10000)
         self.blocklist = set()
-        self.detector = ProxyProtocolDetector()
+        self.blocked_ranges = build_range_table(())
+        self.detector = ProxyProtocolDetector(store)
         
         # Abuse prevention
         self.abuse_contacts = {}
@@ -401,6 +525,15 @@ class EthicalScanManager:
                     ip = line.strip()
                     if ip and not ip.startswith('#'):
                         self.blocklist.add(ip)
+            
+            # CIDR entries (and single IPv4 hosts) go into a searchable range table
+            networks = []
+            for entry in self.blocklist:
+                try:
+                    networks.append(ipaddress.IPv4Network(entry, strict=False))
+                except ValueError:
+                    continue
+            self.blocked_ranges = build_range_table(networks)
             logger.info(f"Loaded {len(self.blocklist)} IPs into blocklist")
         except FileNotFoundError:
             logger.info("No blocklist file found, starting with empty blocklist")
@@ -423,39 +556,55 @@ class EthicalScanManager:
         except:
             return None
     
-    async def is_scan_allowed(self, target: ScanTarget) -> bool:
+    async def is_scan_allowed(self, target: ScanTarget, now: Optional[float] = None) -> bool:
         """Check if we're allowed to scan this target"""
+        if now is None:
+            now = time.monotonic()
+        
+        try:
+            ip_int = int(ipaddress.IPv4Address(target.ip))
+        except ValueError:
+            ip_int = None
+        
         # Check blocklist
-        if target.ip in self.blocklist:
+        if target.ip in self.blocklist or (
+            ip_int is not None and in_range_table(ip_int, self.blocked_ranges)
+        ):
             logger.warning(f"Skipping blocklisted IP: {target.ip}")
             return False
         
         # Check rate limits per IP
         ip_history = self.scan_history.get(target.ip, [])
-        recent_scans = [t for t in ip_history if datetime.utcnow() - t < timedelta(hours=1)]
+        window_start = now - 3600
+        recent_scans = sum(1 for t in ip_history if t > window_start)
         
-        if len(recent_scans) >= 10:
+        if recent_scans >= 10:
             logger.warning(f"Rate limit exceeded for {target.ip}")
             return False
         
         # Check for government/military IPs (simplified)
-        if any(target.ip.startswith(prefix) for prefix in ['11.', '21.', '22.', '26.', '28.', '29.', '30.']):
+        if ip_int is not None and in_range_table(ip_int, GOVERNMENT_RANGES):
             logger.warning(f"Skipping government IP range: {target.ip}")
             return False
         
         return True
     
-    async def scan_target(self, target: ScanTarget) -> Optional[ScanResult]:
+    async def scan_target(self, target: ScanTarget, now: Optional[float] = None) -> Optional[ScanResult]:
         """Scan a single target ethically"""
-        if not await self.is_scan_allowed(target):
+        if now is None:
+            now = time.monotonic()
+        
+        if not await self.is_scan_allowed(target, now):
             return None
         
-        async with self.semaphore:
-            await self.rate_limiter.acquire()
+        async with self.semaphore, self.rate_limiter:
+            # Stamp when the scan actually starts; in a long batch that can be
+            # well after `now`, which only serves the admission check above
+            started = time.monotonic()
             
             # Log the scan attempt
             self.scan_log.append({
-                'timestamp': datetime.utcnow(),
+                'timestamp': started,
                 'ip': target.ip,
                 'port': target.port
             })
@@ -463,7 +612,7 @@ class EthicalScanManager:
             # Update scan history
             if target.ip not in self.scan_history:
                 self.scan_history[target.ip] = []
-            self.scan_history[target.ip].append(datetime.utcnow())
+            self.scan_history[target.ip].append(started)
             
             # Perform the actual scan
             result = await self.detector.detect_proxy(target.ip, target.port)
@@ -474,9 +623,12 @@ class EthicalScanManager:
             
             return result
     
-    async def scan_batch(self, targets: List[ScanTarget]) -> List[ScanResult]:
+    async def scan_batch(self, targets: Iterable[ScanTarget]) -> List[ScanResult]:
         """Scan multiple targets concurrently"""
-        tasks = [self.scan_target(target) for target in targets]
+        # One clock read per batch for the admission checks; logs and history
+        # are stamped when each scan starts
+        now = time.monotonic()
+        tasks = [self.scan_target(target, now) for target in targets]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Filter out None results and exceptions
@@ -501,9 +653,8 @@ class EthicalScanManager:
             }
         
         # Calculate scan rate
-        now = datetime.utcnow()
-        recent_scans = [s for s in self.scan_log if now - s['timestamp'] < timedelta(minutes=1)]
-        scan_rate = len(recent_scans)
+        window_start = time.monotonic() - 60
+        scan_rate = sum(1 for s in self.scan_log if s['timestamp'] > window_start)
         
         # Count unique IPs scanned
         active_ips = len(set(s['ip'] for s in self.scan_log))
@@ -518,29 +669,70 @@ class EthicalScanManager:
 
 
 class RateLimiter:
-    """Token bucket rate limiter"""
+    """Leaky bucket rate limiter (aiolimiter-style)"""
+    
+    __slots__ = ('max_rate', 'time_period', '_rate_per_sec', '_level', '_last_check', '_waiters')
     
     def __init__(self, rate: float, burst: int = None):
-        self.rate = rate
-        self.burst = burst or int(rate * 2)
-        self.tokens = self.burst
-        self.last_update = time.monotonic()
-        self._lock = asyncio.Lock()
-    
-    async def acquire(self, tokens: int = 1):
-        """Acquire tokens, waiting if necessary"""
-        async with self._lock:
-            while self.tokens < tokens:
-                now = time.monotonic()
-                elapsed = now - self.last_update
-                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
-                self.last_update = now
-                
-                if self.tokens < tokens:
-                    sleep_time = (tokens - self.tokens) / self.rate
-                    await asyncio.sleep(sleep_time)
-            
-            self.tokens -= tokens
+        # Bucket holds `burst` requests and drains at `rate` per second
+        self.max_rate = burst or int(rate * 2)
+        self.time_period = self.max_rate / rate
+        self._rate_per_sec = rate
+        self._level = 0.0
+        self._last_check = 0.0
+        self._waiters: Dict[asyncio.Task, asyncio.Future] = {}
+    
+    @property
+    def rate(self) -> float:
+        """Requests per second"""
+        return self._rate_per_sec
+    
+    def _leak(self):
+        """Drain the bucket for the time elapsed since the last check"""
+        now = asyncio.get_running_loop().time()
+        if self._level:
+            elapsed = now - self._last_check
+            self._level = max(self._level - elapsed * self._rate_per_sec, 0.0)
+        self._last_check = now
+    
+    def has_capacity(self, amount: float = 1) -> bool:
+        """Check whether `amount` fits in the bucket right now"""
+        self._leak()
+        requested = self._level + amount
+        
+        # Wake the next waiter if there is room left after this request
+        if requested < self.max_rate:
+            for fut in self._waiters.values():
+                if not fut.done():
+                    fut.set_result(True)
+                    break
+        
+        return requested <= self.max_rate
+    
+    async def acquire(self, amount: float = 1):
+        """Acquire capacity, waiting if necessary"""
+        if amount > self.max_rate:
+            raise ValueError("Can't acquire more than the bucket capacity")
+        
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        while not self.has_capacity(amount):
+            fut = loop.create_future()
+            self._waiters[task] = fut
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), amount / self._rate_per_sec)
+            except asyncio.TimeoutError:
+                pass
+            fut.cancel()
+        self._waiters.pop(task, None)
+        
+        self._level += amount
+    
+    async def __aenter__(self):
+        await self.acquire()
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
 
 
 # Test implementation
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared networking helpers for the proxy testers
+DNS caching, proxy connector construction and session pooling
+"""
+
+import asyncio
+import socket
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import aiohttp_socks
+import httpx
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a resolved host stays in the process-wide cache
+DNS_CACHE_TTL = 900
+
+_dns_cache: Dict[str, Tuple[float, List[str]]] = {}
+_resolvers: Dict[asyncio.AbstractEventLoop, "aiodns.DNSResolver"] = {}
+
+
+def create_proxy_connector(proxy_url: str, **kwargs) -> aiohttp_socks.ProxyConnector:
+    """Build a SOCKS connector that leaves target resolution to the proxy"""
+    # aiohttp_socks bypasses the aiohttp resolver, so a local DNS cache cannot
+    # help here; socks5 can resolve remotely instead of doing a lookup per request
+    if urlparse(proxy_url).scheme == 'socks5':
+        kwargs.setdefault('rdns', True)
+    # Pooled sessions live long; reap aborted TLS transports instead of leaking them
+    kwargs.setdefault('enable_cleanup_closed', True)
+    return aiohttp_socks.ProxyConnector.from_url(proxy_url, **kwargs)
+
+
+class ProxySessionCache:
+    """
+    Pools one client per proxy URL so testers share TCP/TLS connections
+    aiohttp sessions serve SOCKS proxies, httpx clients serve HTTP proxies
+    """
+    
+    def __init__(self, limit: int = 50, timeout: float = 30.0):
+        self.limit = limit
+        self.timeout = timeout
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def get_session(self, proxy_url: str) -> aiohttp.ClientSession:
+        """Get the pooled aiohttp session for a SOCKS proxy"""
+        session = self._sessions.get(proxy_url)
+        if session is None or session.closed:
+            connector = create_proxy_connector(proxy_url, limit=self.limit)
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._sessions[proxy_url] = session
+        return session
+    
+    def get_client(self, proxy_url: str) -> httpx.AsyncClient:
+        """Get the pooled httpx client for an HTTP proxy"""
+        client = self._clients.get(proxy_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                proxies={'all://': proxy_url},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.limit)
+            )
+            self._clients[proxy_url] = client
+        return client
+    
+    async def close(self):
+        """Close every pooled session and client"""
+        sessions, self._sessions = self._sessions, {}
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(
+            *(session.close() for session in sessions.values()),
+            *(client.aclose() for client in clients.values()),
+            return_exceptions=True
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+@asynccontextmanager
+async def proxy_session(proxy_url: str,
+                        sessions: Optional[ProxySessionCache] = None) -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the pooled SOCKS session, or a one-off session if there is no pool"""
+    if sessions is not None:
+        yield sessions.get_session(proxy_url)
+        return
+    
+    async with aiohttp.ClientSession(connector=create_proxy_connector(proxy_url)) as session:
+        yield session
+
+
+@asynccontextmanager
+async def proxy_client(proxy_url: str,
+                       sessions: Optional[ProxySessionCache] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the pooled HTTP-proxy client, or a one-off client if there is no pool"""
+    if sessions is not None:
+        yield sessions.get_client(proxy_url)
+        return
+    
+    async with httpx.AsyncClient(proxies={'all://': proxy_url}) as client:
+        yield client
+
+
+async def resolve_host(host: str) -> List[str]:
+    """Resolve a hostname to IPv4 addresses through a shared TTL cache"""
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+
+    cached = _dns_cache.get(host)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    if aiodns is not None:
+        resolver = _resolvers.get(loop)
+        if resolver is None:
+            resolver = _resolvers[loop] = aiodns.DNSResolver(loop=loop)
+        result = await resolver.gethostbyname(host, socket.AF_INET)
+        addresses = list(result.addresses)
+    else:
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+    _dns_cache[host] = (now + DNS_CACHE_TTL, addresses)
+    return addresses
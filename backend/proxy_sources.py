@@ -16,6 +16,7 @@ from datetime import datetime, timedelta
 from urllib.parse import urlparse
 import hashlib
 from collections import deque
+from itertools import islice
 import logging
 from aiohttp_retry import RetryClient, ExponentialRetry
 from bs4 import BeautifulSoup
@@ -131,6 +132,16 @@ class AntiDetectionManager:
 class ProxySourceBase:
     """Base class for proxy sources with common functionality"""
     
+    # Parser patterns, compiled once at class load instead of per line
+    _BASIC_PATTERN = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})')
+    _PROTOCOL_PATTERN = re.compile(
+        r'(https?|socks[45]?)://(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})',
+        re.IGNORECASE
+    )
+    _DETAILED_PATTERN = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})\s*(.*)')
+    _COUNTRY_PATTERN = re.compile(r'\b([A-Z]{2})\b')
+    _EXTRA_PROTOCOL_PATTERN = re.compile(r'\b(HTTPS?|SOCKS[45]?)\b', re.IGNORECASE)
+    
     def __init__(self, name: str, rate_limit: float = 1.0):
         self.name = name
         self.rate_limiter = RateLimiter(rate_limit)
@@ -157,17 +168,26 @@ class ProxySourceBase:
         if not proxy_str:
             return None
         
+        # Fast path for bare IP:PORT with plain string checks; accepts exactly
+        # what _BASIC_PATTERN plus _is_valid_ip would (ASCII only, so every
+        # isdigit() field is safe to int())
+        host, sep, port = proxy_str.rpartition(':')
+        octets = host.split('.')
+        if (sep and proxy_str.isascii() and port.isdigit() and len(port) <= 5
+                and len(octets) == 4 and all(o.isdigit() and len(o) <= 3 for o in octets)):
+            if all(int(o) <= 255 for o in octets) and 1 <= int(port) <= 65535:
+                return ProxyEntry(ip=host, port=int(port), source=self.name)
+            return None
+        
         # Format 1: IP:PORT
-        basic_pattern = r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
-        match = re.match(basic_pattern, proxy_str)
+        match = self._BASIC_PATTERN.fullmatch(proxy_str)
         if match:
             ip, port = match.groups()
             if self._is_valid_ip(ip) and 1 <= int(port) <= 65535:
                 return ProxyEntry(ip=ip, port=int(port), source=self.name)
         
         # Format 2: PROTOCOL://IP:PORT
-        protocol_pattern = r'^(https?|socks[45]?)://(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
-        match = re.match(protocol_pattern, proxy_str, re.IGNORECASE)
+        match = self._PROTOCOL_PATTERN.fullmatch(proxy_str)
         if match:
             protocol, ip, port = match.groups()
             if self._is_valid_ip(ip) and 1 <= int(port) <= 65535:
@@ -179,20 +199,19 @@ class ProxySourceBase:
                 )
         
         # Format 3: IP:PORT with additional info (country, type, etc)
-        detailed_pattern = r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})\s*(.*)$'
-        match = re.match(detailed_pattern, proxy_str)
+        match = self._DETAILED_PATTERN.fullmatch(proxy_str)
         if match:
             ip, port, extra = match.groups()
             if self._is_valid_ip(ip) and 1 <= int(port) <= 65535:
                 proxy = ProxyEntry(ip=ip, port=int(port), source=self.name)
                 
                 # Extract country code if present
-                country_match = re.search(r'\b([A-Z]{2})\b', extra)
+                country_match = self._COUNTRY_PATTERN.search(extra)
                 if country_match:
                     proxy.country = country_match.group(1)
                 
                 # Extract protocol if present
-                proto_match = re.search(r'\b(HTTPS?|SOCKS[45]?)\b', extra, re.IGNORECASE)
+                proto_match = self._EXTRA_PROTOCOL_PATTERN.search(extra)
                 if proto_match:
                     proxy.protocol = proto_match.group(1).lower()
                 
@@ -570,7 +589,7 @@ async def test_proxy_sources():
     
     # Show sample proxies
     print("\nSample proxies:")
-    for i, proxy in enumerate(list(proxies)[:5]):
+    for i, proxy in enumerate(islice(proxies, 5)):
         print(f"  {i+1}. {proxy.address} ({proxy.protocol}) from {proxy.source}")
     
     # Test 2: Check caching
@@ -160,6 +160,7 @@ class ProxyTester:
         
         @self.app.on_event("shutdown")
         async def shutdown():
+            await self.advanced_tester.close()
             if self.redis:
                 self.redis.close()
                 await self.redis.wait_closed()
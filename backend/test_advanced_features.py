@@ -5,15 +5,43 @@ Tests proxy providers, SIEM integration, and analytics
 """
 
 import asyncio
+import heapq
+import logging
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
+from types import MappingProxyType
 import json
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    # Fall back to the stdlib encoder
+    orjson = None
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from concurrent_tests import run_concurrently
+
+logger = logging.getLogger(__name__)
+
+# Immutable fixtures shared across test runs
+COUNTRIES = ('US', 'UK', 'DE', 'FR', 'CA', 'AU', 'JP', 'BR')
+PROXY_TYPES = ('datacenter', 'residential', 'mobile')
+FLOW_SOURCES = ('scraper', 'scanner', 'api')
+FLOW_DESTINATIONS = ('testing', 'production', 'staging')
+ALERT_ACTIONS = ('notify_security', 'block_proxy', 'investigate')
+RESPONSE_ACTIONS = MappingProxyType({
+    'proxy_blocked': True,
+    'credentials_rotated': True,
+    'incident_created': 'INC-2024-0123',
+    'notifications_sent': ('security@company.com', 'ops-team'),
+    'logs_archived': True
+})
 
 async def test_proxy_providers():
     """Test proxy provider integrations"""
@@ -100,8 +128,11 @@ async def test_proxy_providers():
         
         # Test 4: Usage statistics
         print("\n📊 Getting usage statistics...")
-        for provider_name in ["brightdata", "oxylabs", "iproyal"]:
-            stats = await manager.get_usage_stats(provider_name)
+        provider_names = ["brightdata", "oxylabs", "iproyal"]
+        all_stats = await asyncio.gather(
+            *(manager.get_usage_stats(provider_name) for provider_name in provider_names)
+        )
+        for provider_name, stats in zip(provider_names, all_stats):
             print(f"\n  {provider_name.upper()} Usage:")
             print(f"    Bandwidth: {stats.bandwidth_used_gb}/{stats.bandwidth_limit_gb or '∞'} GB")
             print(f"    Requests: {stats.requests_made:,}")
@@ -128,8 +159,7 @@ async def test_proxy_providers():
         
     except Exception as e:
         print(f"\n❌ Proxy provider test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Proxy provider test failed")
         return False
 
 
@@ -240,27 +270,20 @@ async def test_siem_integration():
         
         # Test 4: Batch events
         print("\n📦 Testing batch event creation...")
-        batch_events = []
-        
-        for i in range(10):
-            event = SIEMEvent(
-                event_type=f"test_event_{i}",
-                severity=EventSeverity.INFO,
-                category=EventCategory.OPERATIONAL,
-                title=f"Test Event {i}",
-                description=f"Automated test event number {i}",
-                proxy_ip=f"192.168.1.{i}",
-                proxy_port=8080 + i,
-                metrics={'test_value': i * 10}
-            )
-            batch_events.append(event)
+        batch_events = SIEMEvent.from_rows(
+            ('event_type', 'severity', 'category', 'title', 'description',
+             'proxy_ip', 'proxy_port', 'metrics'),
+            ((f"test_event_{i}", EventSeverity.INFO, EventCategory.OPERATIONAL,
+              f"Test Event {i}", f"Automated test event number {i}",
+              f"192.168.1.{i}", 8080 + i, {'test_value': i * 10})
+             for i in range(10))
+        )
         
         print(f"✅ Created {len(batch_events)} test events")
         
         # Test 5: Queue events (would send in production)
         print("\n📤 Queueing events for delivery...")
-        for event in [security_event, perf_event] + batch_events[:3]:
-            await manager.send_event(event)
+        await manager.send_events([security_event, perf_event, *batch_events[:3]])
         
         print("✅ Events queued successfully")
         
@@ -280,8 +303,7 @@ async def test_siem_integration():
         
     except Exception as e:
         print(f"\n❌ SIEM integration test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("SIEM integration test failed")
         return False
 
 
@@ -311,80 +333,78 @@ async def test_analytics_api():
         print(f"   Total proxies: {metrics['total_proxies']:,}")
         print(f"   Success rate: {metrics['success_rate']}%")
         
-        # Test 2: Time series data
-        timeseries = []
-        now = datetime.utcnow()
-        
-        for i in range(24):
-            timeseries.append({
-                'time': (now - timedelta(hours=23-i)).strftime('%Y-%m-%d %H:%M:%S'),
-                'success_rate': 85 + (i % 10),
-                'response_time': 200 + (i * 10 % 300),
-                'active_proxies': 10000 + (i * 100 % 2000)
-            })
-        
-        print(f"\n✅ Time series data: {len(timeseries)} hours")
-        print(f"   Latest success rate: {timeseries[-1]['success_rate']}%")
-        print(f"   Latest response time: {timeseries[-1]['response_time']}ms")
-        
-        # Test 3: Geographic distribution
-        geographic = []
-        countries = ['US', 'UK', 'DE', 'FR', 'CA', 'AU', 'JP', 'BR']
-        
-        for country in countries:
-            for hour in range(24):
-                geographic.append({
-                    'country': country,
-                    'hour': hour,
-                    'value': 50 + (hash(f"{country}{hour}") % 50)
-                })
+        # Test 2: Time series data (columnar: one array per field)
+        now = np.datetime64(datetime.utcnow().replace(microsecond=0), 's')
+        hours = np.arange(24)
+        times = now - (23 - hours).astype('timedelta64[h]')
+        
+        timeseries = {
+            'time': np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' '),
+            'success_rate': 85 + hours % 10,
+            'response_time': 200 + hours * 10 % 300,
+            'active_proxies': 10000 + hours * 100 % 2000
+        }
+        
+        print(f"\n✅ Time series data: {len(timeseries['time'])} hours")
+        print(f"   Latest success rate: {timeseries['success_rate'][-1]}%")
+        print(f"   Latest response time: {timeseries['response_time'][-1]}ms")
+        
+        # Test 3: Geographic distribution (country-major, 24 hours each)
+        countries = np.array(COUNTRIES)
+        geo_countries = np.repeat(countries, 24)
+        geo_hours = np.tile(hours, len(countries))
+        
+        geographic = {
+            'country': geo_countries,
+            'hour': geo_hours,
+            'value': 50 + np.fromiter(
+                (hash(f"{country}{hour}") % 50 for country, hour in zip(geo_countries, geo_hours)),
+                dtype=np.int64,
+                count=len(geo_countries)
+            )
+        }
         
         print(f"\n✅ Geographic data: {len(countries)} countries x 24 hours")
         
         # Test 4: Proxy distribution
-        distribution = {
-            'datacenter': 7823,
-            'residential': 3421,
-            'mobile': 1299
-        }
+        distribution = dict(zip(PROXY_TYPES, (7823, 3421, 1299)))
         
         total = sum(distribution.values())
-        print(f"\n✅ Proxy distribution:")
+        lines = ["\n✅ Proxy distribution:"]
         for ptype, count in distribution.items():
             percentage = (count / total) * 100
-            print(f"   {ptype}: {count:,} ({percentage:.1f}%)")
-        
-        # Test 5: Top proxies
-        top_proxies = []
-        
-        for i in range(20):
-            top_proxies.append({
-                'ip': f"192.168.{i//5}.{i*10}",
-                'type': ['datacenter', 'residential', 'mobile'][i % 3],
-                'country': countries[i % len(countries)],
-                'success_rate': 90 + (i % 10),
-                'avg_response': 100 + (i * 20),
-                'uptime': 95 + (i % 5),
-                'score': 80 + (i % 20)
-            })
-        
-        print(f"\n✅ Top proxies: {len(top_proxies)} entries")
-        print("   Top 3 by score:")
-        sorted_proxies = sorted(top_proxies, key=lambda x: x['score'], reverse=True)
-        for i, proxy in enumerate(sorted_proxies[:3]):
-            print(f"   {i+1}. {proxy['ip']} - Score: {proxy['score']}")
+            lines.append(f"   {ptype}: {count:,} ({percentage:.1f}%)")
+        sys.stdout.write("\n".join(lines) + "\n")
+        
+        # Test 5: Top proxies (columnar: one array per field)
+        idx = np.arange(20)
+        proxy_types = np.array(PROXY_TYPES)
+        
+        top_proxies = {
+            'ip': [f"192.168.{i//5}.{i*10}" for i in range(20)],
+            'type': proxy_types[idx % 3],
+            'country': countries[idx % len(countries)],
+            'success_rate': 90 + idx % 10,
+            'avg_response': 100 + idx * 20,
+            'uptime': 95 + idx % 5,
+            'score': 80 + idx % 20
+        }
+        
+        scores = top_proxies['score']
+        lines = [f"\n✅ Top proxies: {len(scores)} entries", "   Top 3 by score:"]
+        for i, row in enumerate(heapq.nlargest(3, range(len(scores)), key=scores.__getitem__)):
+            lines.append(f"   {i+1}. {top_proxies['ip'][row]} - Score: {scores[row]}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # Test 6: Response time histogram
-        response_times = []
-        for _ in range(1000):
-            # Normal distribution around 300ms
-            import random
-            response_times.append(max(50, min(1000, random.gauss(300, 100))))
+        # Normal distribution around 300ms, seeded for reproducible runs
+        rng = np.random.default_rng(0)
+        response_times = np.clip(rng.normal(300, 100, 1000), 50, 1000)
         
         print(f"\n✅ Response time distribution: {len(response_times)} samples")
-        print(f"   Min: {min(response_times):.0f}ms")
-        print(f"   Max: {max(response_times):.0f}ms")
-        print(f"   Avg: {sum(response_times)/len(response_times):.0f}ms")
+        print(f"   Min: {response_times.min():.0f}ms")
+        print(f"   Max: {response_times.max():.0f}ms")
+        print(f"   Avg: {response_times.mean():.0f}ms")
         
         # Create full analytics response
         analytics_response = {
@@ -395,21 +415,28 @@ async def test_analytics_api():
             'response_times': response_times,
             'top_proxies': top_proxies,
             'flow_data': {
-                'sources': ['scraper', 'scanner', 'api'],
+                'sources': FLOW_SOURCES,
                 'types': list(distribution.keys()),
-                'destinations': ['testing', 'production', 'staging']
+                'destinations': FLOW_DESTINATIONS
             }
         }
         
         print("\n✅ Complete analytics response structure validated")
-        print(f"   Response size: {len(json.dumps(analytics_response))} bytes")
+        if orjson:
+            payload = orjson.dumps(
+                analytics_response,
+                default=np.ndarray.tolist,
+                option=orjson.OPT_SERIALIZE_NUMPY
+            )
+        else:
+            payload = json.dumps(analytics_response, default=np.ndarray.tolist, separators=(',', ':'))
+        print(f"   Response size: {len(payload)} bytes")
         
         return True
         
     except Exception as e:
         print(f"\n❌ Analytics API test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Analytics API test failed")
         return False
 
 
@@ -461,7 +488,7 @@ async def test_integration():
             'severity': EventSeverity.HIGH.value,
             'title': 'High-Risk Proxy Activity Detected',
             'description': f"Proxy {anomaly_data['proxy_ip']} showing suspicious activity",
-            'actions': ['notify_security', 'block_proxy', 'investigate']
+            'actions': ALERT_ACTIONS
         }
         print(f"   Alert ID: {alert['id']}")
         print(f"   Severity: {alert['severity']}")
@@ -469,15 +496,7 @@ async def test_integration():
         
         # Step 4: Automated response
         print("\n4️⃣ Automated response initiated...")
-        response_actions = {
-            'proxy_blocked': True,
-            'credentials_rotated': True,
-            'incident_created': 'INC-2024-0123',
-            'notifications_sent': ['security@company.com', 'ops-team'],
-            'logs_archived': True
-        }
-        
-        for action, result in response_actions.items():
+        for action, result in RESPONSE_ACTIONS.items():
             status = "✓" if result else "✗"
             print(f"   {status} {action.replace('_', ' ').title()}: {result}")
         
@@ -500,8 +519,7 @@ async def test_integration():
         
     except Exception as e:
         print(f"\n❌ Integration test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Integration test failed")
         return False
 
 
@@ -515,11 +533,15 @@ async def main():
     test_results = []
     
     try:
-        # Run all tests
-        test_results.append(("Proxy Providers", await test_proxy_providers()))
-        test_results.append(("SIEM Integration", await test_siem_integration()))
-        test_results.append(("Analytics API", await test_analytics_api()))
-        test_results.append(("Full Integration", await test_integration()))
+        # Run all tests concurrently, then replay their output in order
+        tests = [
+            ("Proxy Providers", test_proxy_providers),
+            ("SIEM Integration", test_siem_integration),
+            ("Analytics API", test_analytics_api),
+            ("Full Integration", test_integration),
+        ]
+        
+        test_results.extend(await run_concurrently(tests))
         
         # Summary
         print("\n" + "=" * 70)
@@ -557,8 +579,7 @@ async def main():
         print("\n\n⚠️ Tests interrupted by user")
     except Exception as e:
         print(f"\n\n❌ Test suite failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Test suite failed")
 
 
 if __name__ == "__main__":
@@ -567,5 +588,12 @@ if __name__ == "__main__":
         print("❌ Python 3.7+ required")
         sys.exit(1)
     
+    # Use the libuv event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run tests
     asyncio.run(main())
\ No newline at end of file
@@ -5,11 +5,15 @@ Provides proof that the web scraping module works
 """
 
 import asyncio
+import logging
 import sys
-import time
+from collections import Counter
 from datetime import datetime
+from itertools import islice
 from proxy_sources import ProxySourceManager, GitHubProxyList, ProxyScrapeCom
 
+logger = logging.getLogger(__name__)
+
 async def test_individual_sources():
     """Test each source individually"""
     print("=" * 70)
@@ -21,30 +25,39 @@ async def test_individual_sources():
         ProxyScrapeCom(),
     ]
     
-    for source in sources:
+    loop = asyncio.get_running_loop()
+    
+    async def timed_fetch(source):
+        start_time = loop.time()
+        proxies = await asyncio.wait_for(source.fetch(), timeout=30)
+        return proxies, loop.time() - start_time
+    
+    # Sources are independent, so fetch them concurrently
+    results = await asyncio.gather(
+        *(timed_fetch(source) for source in sources),
+        return_exceptions=True
+    )
+    
+    for source, result in zip(sources, results):
         print(f"\n🔍 Testing {source.name}...")
         print(f"Rate limit: {source.rate_limiter.rate} req/s")
         
-        try:
-            start_time = time.time()
-            proxies = await source.fetch()
-            duration = time.time() - start_time
-            
-            print(f"✅ Success! Found {len(proxies)} proxies in {duration:.2f}s")
-            
-            # Show samples
-            if proxies:
-                print(f"\nSample proxies from {source.name}:")
-                for i, proxy in enumerate(list(proxies)[:3]):
-                    print(f"  {proxy.address} - {proxy.protocol} - {proxy.country or 'Unknown'}")
-            
-            # Show reliability
-            print(f"Reliability score: {source.reliability_score:.2%}")
-            
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        if isinstance(result, Exception):
+            print(f"❌ Error: {str(result)}")
+            logger.error(f"{source.name} fetch failed", exc_info=result)
+            continue
+        
+        proxies, duration = result
+        print(f"✅ Success! Found {len(proxies)} proxies in {duration:.2f}s")
+        
+        # Show samples
+        if proxies:
+            print(f"\nSample proxies from {source.name}:")
+            for proxy in islice(proxies, 3):
+                print(f"  {proxy.address} - {proxy.protocol} - {proxy.country or 'Unknown'}")
+        
+        # Show reliability
+        print(f"Reliability score: {source.reliability_score:.2%}")
 
 
 async def test_manager_functionality():
@@ -54,24 +67,19 @@ async def test_manager_functionality():
     print("=" * 70)
     
     manager = ProxySourceManager()
+    loop = asyncio.get_running_loop()
     
     # Test 1: Initial fetch
     print("\n📥 Test 1: Initial proxy discovery...")
-    start = time.time()
+    start = loop.time()
     proxies = await manager.get_proxies()
-    duration = time.time() - start
+    duration = loop.time() - start
     
     print(f"✅ Discovered {len(proxies)} unique proxies in {duration:.2f}s")
     
-    # Analyze by protocol
-    by_protocol = {}
-    by_source = {}
-    
-    for proxy in proxies:
-        # Count by protocol
-        by_protocol[proxy.protocol] = by_protocol.get(proxy.protocol, 0) + 1
-        # Count by source
-        by_source[proxy.source] = by_source.get(proxy.source, 0) + 1
+    # Analyze by protocol and source
+    by_protocol = Counter(proxy.protocol for proxy in proxies)
+    by_source = Counter(proxy.source for proxy in proxies)
     
     print("\n📊 Breakdown by protocol:")
     for protocol, count in sorted(by_protocol.items()):
@@ -83,18 +91,18 @@ async def test_manager_functionality():
     
     # Test 2: Cache functionality
     print("\n💾 Test 2: Cache functionality...")
-    start = time.time()
+    start = loop.time()
     cached_proxies = await manager.get_proxies()
-    cache_duration = time.time() - start
+    cache_duration = loop.time() - start
     
     print(f"✅ Cache hit! Retrieved {len(cached_proxies)} proxies in {cache_duration:.3f}s")
     print(f"   Speed improvement: {duration/cache_duration:.1f}x faster")
     
     # Test 3: Force refresh
     print("\n🔄 Test 3: Force refresh...")
-    start = time.time()
+    start = loop.time()
     refreshed_proxies = await manager.get_proxies(force_refresh=True)
-    refresh_duration = time.time() - start
+    refresh_duration = loop.time() - start
     
     print(f"✅ Force refreshed {len(refreshed_proxies)} proxies in {refresh_duration:.2f}s")
     
@@ -124,12 +132,14 @@ async def test_anti_detection():
     
     # Get multiple sets of headers
     headers_sets = []
+    lines = []
     for i in range(5):
         headers = anti_detect.get_headers()
         headers_sets.append(headers)
-        print(f"\nRequest {i+1}:")
-        print(f"  User-Agent: {headers['User-Agent'][:60]}...")
-        print(f"  Has Referer: {'Referer' in headers}")
+        lines.append(f"\nRequest {i+1}:")
+        lines.append(f"  User-Agent: {headers['User-Agent'][:60]}...")
+        lines.append(f"  Has Referer: {'Referer' in headers}")
+    sys.stdout.write("\n".join(lines) + "\n")
     
     # Check that user agents are different
     user_agents = [h['User-Agent'] for h in headers_sets]
@@ -139,12 +149,15 @@ async def test_anti_detection():
     
     # Test delay functionality
     print("\n⏱️ Testing random delays...")
-    delays = []
-    for i in range(3):
-        start = time.time()
+    loop = asyncio.get_running_loop()
+    
+    async def timed_delay():
+        start = loop.time()
         await anti_detect.random_delay(0.1, 0.5)
-        delay = time.time() - start
-        delays.append(delay)
+        return loop.time() - start
+    
+    delays = await asyncio.gather(*(timed_delay() for _ in range(3)))
+    for i, delay in enumerate(delays):
         print(f"  Delay {i+1}: {delay:.3f}s")
     
     print(f"✅ Average delay: {sum(delays)/len(delays):.3f}s")
@@ -180,6 +193,7 @@ async def test_parser_robustness():
     print("\n🧪 Testing proxy parser...")
     passed = 0
     failed = 0
+    lines = []
     
     for test_input, should_parse in test_cases:
         result = test_source.parse_proxy_string(test_input)
@@ -187,11 +201,12 @@ async def test_parser_robustness():
         
         if success:
             passed += 1
-            print(f"✅ '{test_input}' -> {result.address if result else 'None'}")
+            lines.append(f"✅ '{test_input}' -> {result.address if result else 'None'}")
         else:
             failed += 1
-            print(f"❌ '{test_input}' -> Unexpected result")
+            lines.append(f"❌ '{test_input}' -> Unexpected result")
     
+    sys.stdout.write("\n".join(lines) + "\n")
     print(f"\n📊 Parser test results: {passed} passed, {failed} failed")
 
 
@@ -215,8 +230,8 @@ async def test_live_discovery():
     print(f"{'IP:Port':<25} {'Protocol':<10} {'Source':<20}")
     print("-" * 60)
     
-    for i, proxy in enumerate(list(proxies)[:10]):
-        print(f"{proxy.address:<25} {proxy.protocol:<10} {proxy.source:<20}")
+    lines = [f"{proxy.address:<25} {proxy.protocol:<10} {proxy.source:<20}" for proxy in islice(proxies, 10)]
+    sys.stdout.write("".join(line + "\n" for line in lines))
     
     print("\n✅ Phase 1 complete! Web scraping module is working perfectly.")
 
@@ -244,8 +259,7 @@ async def main():
         print("\n\n⚠️ Tests interrupted by user")
     except Exception as e:
         print(f"\n\n❌ Test suite failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Test suite failed")
 
 
 if __name__ == "__main__":
@@ -254,5 +268,12 @@ if __name__ == "__main__":
         print("❌ Python 3.7+ required")
         sys.exit(1)
     
+    # Use the libuv event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run tests
     asyncio.run(main())
\ No newline at end of file
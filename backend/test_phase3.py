@@ -5,11 +5,16 @@ Demonstrates real implementations of all advanced features
 """
 
 import asyncio
+import functools
 import sys
 import time
 from datetime import datetime
+from typing import Optional
+import numpy as np
 from advanced_testing import AdvancedProxyTester
 from webrtc_alternative import IPLeakDetector
+from proxy_sessions import ProxySessionCache
+from concurrent_tests import run_concurrently
 
 # For individual component tests
 from advanced_testing import (
@@ -19,14 +24,19 @@ from advanced_testing import (
     LatencyStabilityAnalyzer
 )
 
+# Histogram edges for the latency distribution report
+LATENCY_BUCKETS_MS = [0, 100, 500, 1000, np.inf]
 
-async def test_speed_testing():
+# Seconds between progress-dot writes
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+async def test_speed_testing(sessions: Optional[ProxySessionCache] = None):
     """Test real bandwidth measurement"""
     print("=" * 70)
     print("PHASE 3 TEST 1: Real Speed Testing")
     print("=" * 70)
     
-    tester = ProxySpeedTester()
+    tester = ProxySpeedTester(sessions)
     
     # Test proxies
     test_proxies = [
@@ -55,13 +65,13 @@ async def test_speed_testing():
     return True
 
 
-async def test_dns_leak_detection():
+async def test_dns_leak_detection(sessions: Optional[ProxySessionCache] = None):
     """Test DNS leak detection"""
     print("\n" + "=" * 70)
     print("PHASE 3 TEST 2: DNS Leak Detection")
     print("=" * 70)
     
-    detector = DNSLeakDetector()
+    detector = DNSLeakDetector(sessions)
     
     test_proxy = 'socks5://167.172.224.108:1080'
     expected_ip = '167.172.224.108'
@@ -84,13 +94,13 @@ async def test_dns_leak_detection():
     return True
 
 
-async def test_ssl_fingerprinting():
+async def test_ssl_fingerprinting(sessions: Optional[ProxySessionCache] = None):
     """Test SSL/TLS fingerprinting"""
     print("\n" + "=" * 70)
     print("PHASE 3 TEST 3: SSL/TLS Fingerprinting")
     print("=" * 70)
     
-    fingerprinter = SSLFingerprinter()
+    fingerprinter = SSLFingerprinter(sessions)
     
     test_proxy = 'socks5://167.172.224.108:1080'
     test_sites = [
@@ -123,13 +133,30 @@ async def test_ssl_fingerprinting():
     return True
 
 
-async def test_latency_stability():
+async def _print_dots(progress: asyncio.Queue):
+    """Print a progress dot for each sample reported, until a None sentinel"""
+    finished = False
+    while not finished:
+        # Drain everything reported since the last write into one write
+        reported = [await progress.get()]
+        while not progress.empty():
+            reported.append(progress.get_nowait())
+        
+        finished = reported[-1] is None
+        sys.stdout.write("." * (len(reported) - finished))
+        sys.stdout.flush()
+        
+        if not finished:
+            await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+
+
+async def test_latency_stability(sessions: Optional[ProxySessionCache] = None):
     """Test latency stability analysis"""
     print("\n" + "=" * 70)
     print("PHASE 3 TEST 4: Latency Stability Analysis")
     print("=" * 70)
     
-    analyzer = LatencyStabilityAnalyzer()
+    analyzer = LatencyStabilityAnalyzer(sessions)
     
     test_proxy = 'socks5://167.172.224.108:1080'
     
@@ -141,15 +168,12 @@ async def test_latency_stability():
     # Show progress
     print("   Progress: ", end='', flush=True)
     
-    # Start analysis
-    task = asyncio.create_task(analyzer.analyze_stability(test_proxy))
-    
-    # Show progress dots
-    for i in range(analyzer.samples):
-        print(".", end='', flush=True)
-        await asyncio.sleep(analyzer.sample_interval)
-    
-    result = await task
+    # One dot per completed sample, driven by the analyzer
+    progress = asyncio.Queue()
+    printer = asyncio.create_task(_print_dots(progress))
+    result = await analyzer.analyze_stability(test_proxy, progress=progress)
+    progress.put_nowait(None)
+    await printer
     print(" Done!")
     
     if not result.error:
@@ -165,24 +189,28 @@ async def test_latency_stability():
         
         # Show latency distribution
         if result.measurements:
+            samples = np.asarray(result.measurements, dtype=np.float32)
+            counts, _ = np.histogram(samples, bins=LATENCY_BUCKETS_MS)
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            print(f"      Percentiles: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
             print(f"\n      Latency distribution:")
-            print(f"        < 100ms: {sum(1 for m in result.measurements if m < 100)}")
-            print(f"        100-500ms: {sum(1 for m in result.measurements if 100 <= m < 500)}")
-            print(f"        500-1000ms: {sum(1 for m in result.measurements if 500 <= m < 1000)}")
-            print(f"        > 1000ms: {sum(1 for m in result.measurements if m >= 1000)}")
+            print(f"        < 100ms: {counts[0]}")
+            print(f"        100-500ms: {counts[1]}")
+            print(f"        500-1000ms: {counts[2]}")
+            print(f"        > 1000ms: {counts[3]}")
     else:
         print(f"   ❌ Error: {result.error}")
     
     return True
 
 
-async def test_ip_leak_detection():
+async def test_ip_leak_detection(sessions: Optional[ProxySessionCache] = None):
     """Test IP leak detection (WebRTC alternative)"""
     print("\n" + "=" * 70)
     print("PHASE 3 TEST 5: IP Leak Detection (WebRTC Alternative)")
     print("=" * 70)
     
-    detector = IPLeakDetector()
+    detector = IPLeakDetector(sessions)
     
     test_proxy = 'socks5://167.172.224.108:1080'
     expected_ip = '167.172.224.108'
@@ -217,13 +245,13 @@ async def test_ip_leak_detection():
     return True
 
 
-async def test_integrated_advanced_testing():
+async def test_integrated_advanced_testing(sessions: Optional[ProxySessionCache] = None):
     """Test all features integrated"""
     print("\n" + "=" * 70)
     print("PHASE 3 TEST 6: Integrated Advanced Testing")
     print("=" * 70)
     
-    tester = AdvancedProxyTester()
+    tester = AdvancedProxyTester(sessions)
     
     test_proxy = {
         'ip': '167.172.224.108',
@@ -235,13 +263,13 @@ async def test_integrated_advanced_testing():
     print(f"   {test_proxy['ip']}:{test_proxy['port']} ({test_proxy['protocol']})")
     print(f"   This comprehensive test will take 30-45 seconds...\n")
     
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     results = await tester.run_all_tests(
         test_proxy['ip'],
         test_proxy['port'],
         test_proxy['protocol']
     )
-    duration = time.time() - start_time
+    duration = (time.perf_counter_ns() - start_ns) / 1e9
     
     print(f"   ✅ All tests completed in {duration:.1f} seconds!\n")
     
@@ -303,12 +331,24 @@ async def main():
         print("\n⚠️  Note: Some tests require working proxies.")
         print("If a proxy is offline, that test will fail.\n")
         
-        test_results.append(("Speed Testing", await test_speed_testing()))
-        test_results.append(("DNS Leak Detection", await test_dns_leak_detection()))
-        test_results.append(("SSL Fingerprinting", await test_ssl_fingerprinting()))
-        test_results.append(("Latency Stability", await test_latency_stability()))
-        test_results.append(("IP Leak Detection", await test_ip_leak_detection()))
-        test_results.append(("Integrated Testing", await test_integrated_advanced_testing()))
+        # The tests are independent network probes: run them concurrently,
+        # then replay their output in order
+        tests = [
+            ("Speed Testing", test_speed_testing),
+            ("DNS Leak Detection", test_dns_leak_detection),
+            ("SSL Fingerprinting", test_ssl_fingerprinting),
+            ("Latency Stability", test_latency_stability),
+            ("IP Leak Detection", test_ip_leak_detection),
+            ("Integrated Testing", test_integrated_advanced_testing),
+        ]
+        
+        # Every tester shares one pooled session per proxy URL. The latency
+        # test prints live so its progress dots appear while it samples
+        async with ProxySessionCache() as sessions:
+            test_results.extend(await run_concurrently(
+                [(name, functools.partial(test, sessions)) for name, test in tests],
+                live=("Latency Stability",)
+            ))
         
         # Summary
         print("\n" + "=" * 70)
@@ -351,5 +391,12 @@ if __name__ == "__main__":
         print("❌ Python 3.7+ required")
         sys.exit(1)
     
+    # Use the libuv event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run tests
     asyncio.run(main())
\ No newline at end of file
@@ -5,18 +5,81 @@ Tests ML prediction, rotation detection, webhooks, and alerting
 """
 
 import asyncio
+import contextlib
+import dataclasses
+import functools
+import ipaddress
+import logging
 import sys
 import os
 import time
 import json
 from datetime import datetime, timedelta
-import numpy as np
-import pandas as pd
 from typing import Dict, List, Any
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from concurrent_tests import run_concurrently
+
+logger = logging.getLogger(__name__)
+
+
+async def start_webhook_manager():
+    """Create a webhook manager with its delivery workers running"""
+    from notifications.webhook_manager import WebhookManager
+    manager = WebhookManager()
+    await manager.start(num_workers=2)
+    return manager
+
+
+@functools.lru_cache(maxsize=1)
+def get_base_features():
+    """Sample feature set; variants are derived with dataclasses.replace"""
+    from ml.proxy_predictor import ProxyFeatures
+    return ProxyFeatures(
+        response_time_ms=250.0,
+        download_speed_mbps=50.5,
+        upload_speed_mbps=25.2,
+        latency_ms=45.0,
+        jitter_ms=5.2,
+        packet_loss=0.01,
+        protocol="socks5",
+        country_code="US",
+        city="New York",
+        asn="AS15169",
+        is_residential=True,
+        is_mobile=False,
+        is_datacenter=False,
+        success_rate_7d=0.95,
+        avg_uptime_hours=48.5,
+        failure_count_24h=2,
+        test_count_total=150,
+        ssl_fingerprint_changes=0,
+        dns_leak_detected=False,
+        ip_leak_detected=False,
+        fraud_score=0.15,
+        hour_of_day=14,
+        day_of_week=2,
+        is_weekend=False
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_predictor():
+    """Predictor shared by the ML and integration tests"""
+    from ml.proxy_predictor import ProxyQualityPredictor
+    return ProxyQualityPredictor()
+
+
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """Build the (untrained) Keras model once per run, traced before any test uses it"""
+    predictor = get_predictor()
+    predictor.model = predictor.build_model()
+    predictor.warm_up()
+    return predictor.model
+
 
 async def test_ml_prediction():
     """Test ML-based proxy quality prediction"""
@@ -25,39 +88,15 @@ async def test_ml_prediction():
     print("=" * 70)
     
     try:
-        from ml.proxy_predictor import ProxyQualityPredictor, ProxyFeatures
+        import numpy as np
+        from ml.proxy_predictor import ProxyFeaturesBatch
         
         # Initialize predictor
-        predictor = ProxyQualityPredictor()
+        predictor = get_predictor()
         
         # Create sample features
         print("\n📊 Creating sample proxy features...")
-        features = ProxyFeatures(
-            response_time_ms=250.0,
-            download_speed_mbps=50.5,
-            upload_speed_mbps=25.2,
-            latency_ms=45.0,
-            jitter_ms=5.2,
-            packet_loss=0.01,
-            protocol="socks5",
-            country_code="US",
-            city="New York",
-            asn="AS15169",
-            is_residential=True,
-            is_mobile=False,
-            is_datacenter=False,
-            success_rate_7d=0.95,
-            avg_uptime_hours=48.5,
-            failure_count_24h=2,
-            test_count_total=150,
-            ssl_fingerprint_changes=0,
-            dns_leak_detected=False,
-            ip_leak_detected=False,
-            fraud_score=0.15,
-            hour_of_day=14,
-            day_of_week=2,
-            is_weekend=False
-        )
+        features = get_base_features()
         
         print("✅ Features created successfully")
         print(f"   Protocol: {features.protocol}")
@@ -66,15 +105,21 @@ async def test_ml_prediction():
         
         # Test model building
         print("\n🧠 Building ML model...")
-        model = predictor.build_model()
+        model = get_model()
         print(f"✅ Model built with {len(model.layers)} layers")
         print(f"   Parameters: {model.count_params():,}")
         
         # Test batch prediction capability
         print("\n🔮 Testing batch prediction...")
-        features_list = [features for _ in range(10)]
-        
-        # Since we don't have trained model, test the structure
+        batch = ProxyFeaturesBatch.from_list([features] * 10)
+        X_numeric = batch.to_matrix()
+        X_ids = np.zeros((len(batch), 1), dtype=np.int32)
+        
+        # Since we don't have a trained model, run one forward pass to
+        # check the structure: one (batch, 1) output per task
+        outputs = predictor._forward([X_numeric, X_ids, X_ids, X_ids])
+        print(f"✅ Forward pass on batch of {X_numeric.shape[0]}: "
+              f"{[tuple(output.shape) for output in outputs]}")
         print("✅ ML prediction system architecture validated")
         print("   - Multi-task learning (quality, lifetime, risk)")
         print("   - Attention mechanism for feature importance")
@@ -84,8 +129,7 @@ async def test_ml_prediction():
         
     except Exception as e:
         print(f"\n❌ ML prediction test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ML prediction test failed")
         return False
 
 
@@ -96,8 +140,10 @@ async def test_rotation_detection():
     print("=" * 70)
     
     try:
+        import numpy as np
         from ml.rotation_detector import ProxyRotationDetector
         
+        # One detector for all scenarios; each proxy gets its own session key
         detector = ProxyRotationDetector()
         
         # Test 1: Sequential rotation pattern
@@ -105,75 +151,59 @@ async def test_rotation_detection():
         proxy_ip = "192.168.1.1"
         proxy_port = 8080
         
-        # Simulate sequential IPs
-        sequential_ips = ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.5"]
-        
-        for i, exit_ip in enumerate(sequential_ips * 3):  # Repeat pattern
-            result = await detector.analyze_request(
-                proxy_ip=proxy_ip,
-                proxy_port=proxy_port,
-                exit_ip=exit_ip,
-                headers={"User-Agent": "Test/1.0"},
-                tls_fingerprint="abc123",
-                asn=f"AS1234{i%3}",
-                location={"country": "US", "city": "New York"}
-            )
-            
-            if i >= 10:  # After enough data
-                if result['patterns']:
-                    print(f"✅ Sequential pattern detected!")
-                    print(f"   Total exit IPs: {result['total_exit_ips']}")
-                    print(f"   Rotation score: {result['rotation_score']:.2f}")
-                    for pattern in result['patterns']:
-                        print(f"   Pattern: {pattern['type']} (confidence: {pattern['confidence']:.2f})")
-                    break
+        # Simulate sequential IPs 10.0.0.1-10.0.0.5 as uint32, repeating the pattern
+        first_ip = int(ipaddress.IPv4Address("10.0.0.1"))
+        sequential_ips = np.tile(np.arange(first_ip, first_ip + 5, dtype=np.uint32), 3)
+        
+        result = await detector.analyze_batch(
+            proxy_ip=proxy_ip,
+            proxy_port=proxy_port,
+            exit_ips=sequential_ips,
+            headers={"User-Agent": "Test/1.0"},
+            tls_fingerprint="abc123",
+            asn=[f"AS1234{i%3}" for i in range(sequential_ips.size)],
+            location={"country": "US", "city": "New York"}
+        )
+        
+        if result['patterns']:
+            print(f"✅ Sequential pattern detected!")
+            print(f"   Total exit IPs: {result['total_exit_ips']}")
+            print(f"   Rotation score: {result['rotation_score']:.2f}")
+            for pattern in result['patterns']:
+                print(f"   Pattern: {pattern['type']} (confidence: {pattern['confidence']:.2f})")
         
         # Test 2: Sticky session detection
         print("\n🔒 Testing sticky session detection...")
-        detector2 = ProxyRotationDetector()
         
-        # Simulate sticky sessions
+        # Simulate a sticky session, then a change of IP, in one submission
         sticky_ip = "20.0.0.1"
-        for _ in range(50):
-            await detector2.analyze_request(
-                proxy_ip="192.168.2.1",
-                proxy_port=8081,
-                exit_ip=sticky_ip,
-                headers={"User-Agent": "Test/1.0"},
-                asn="AS5678"
-            )
-        
-        # Change IP
-        for _ in range(50):
-            await detector2.analyze_request(
-                proxy_ip="192.168.2.1",
-                proxy_port=8081,
-                exit_ip="20.0.0.2",
-                headers={"User-Agent": "Test/1.0"},
-                asn="AS5678"
-            )
+        await detector.analyze_batch(
+            proxy_ip="192.168.2.1",
+            proxy_port=8081,
+            exit_ips=[sticky_ip] * 50 + ["20.0.0.2"] * 50,
+            headers={"User-Agent": "Test/1.0"},
+            asn="AS5678"
+        )
         
-        summary = await detector2.get_rotation_summary("192.168.2.1", 8081)
+        summary = await detector.get_rotation_summary("192.168.2.1", 8081)
         print(f"✅ Proxy type classified: {summary['type']}")
         print(f"   Recommendation: {summary['recommendation']}")
         
         # Test 3: Random rotation
         print("\n🎲 Testing random rotation detection...")
-        detector3 = ProxyRotationDetector()
-        
-        # Simulate random IPs
-        import random
-        random_ips = [f"30.0.{random.randint(1,255)}.{random.randint(1,255)}" for _ in range(50)]
-        
-        for exit_ip in random_ips:
-            await detector3.analyze_request(
-                proxy_ip="192.168.3.1",
-                proxy_port=8082,
-                exit_ip=exit_ip,
-                headers={"User-Agent": "Test/1.0"}
-            )
         
-        summary = await detector3.get_rotation_summary("192.168.3.1", 8082)
+        # Simulate random IPs 30.0.x.y as uint32 in one vectorized draw
+        octets = np.random.randint(1, 256, size=(50, 2)).astype(np.uint32)
+        random_ips = (np.uint32(30 << 24) | (octets[:, 0] << 8) | octets[:, 1]).astype(np.uint32)
+        
+        await detector.analyze_batch(
+            proxy_ip="192.168.3.1",
+            proxy_port=8082,
+            exit_ips=random_ips,
+            headers={"User-Agent": "Test/1.0"}
+        )
+        
+        summary = await detector.get_rotation_summary("192.168.3.1", 8082)
         if summary['patterns']:
             print(f"✅ Random pattern detected with {summary['total_ips']} unique IPs")
         
@@ -182,25 +212,23 @@ async def test_rotation_detection():
         
     except Exception as e:
         print(f"\n❌ Rotation detection test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Rotation detection test failed")
         return False
 
 
-async def test_webhook_system():
+async def test_webhook_system(manager=None):
     """Test webhook notification system"""
     print("\n" + "=" * 70)
     print("PHASE 5 TEST 3: Webhook System")
     print("=" * 70)
     
     try:
-        from notifications.webhook_manager import (
-            WebhookManager, WebhookEndpoint, WebhookEvent
-        )
+        from notifications.webhook_manager import WebhookEndpoint, WebhookEvent
         
-        # Initialize manager
-        manager = WebhookManager()
-        await manager.start(num_workers=2)
+        # Initialize manager unless a shared, running one was passed in
+        owns_manager = manager is None
+        if owns_manager:
+            manager = await start_webhook_manager()
         
         print("\n🪝 Testing webhook registration...")
         
@@ -259,20 +287,20 @@ async def test_webhook_system():
         endpoint.rate_limit = 5
         endpoint.rate_window = timedelta(seconds=10)
         
-        triggered = 0
-        for i in range(10):
-            ids = await manager.trigger_event(
+        results = await asyncio.gather(*(
+            manager.trigger_event(
                 WebhookEvent.PROXY_FAILED,
                 data={'test': i, 'country_code': 'US'}
             )
-            if ids:
-                triggered += 1
+            for i in range(10)
+        ))
+        triggered = sum(1 for ids in results if ids)
         
         print(f"✅ Rate limiting working: {triggered}/10 events delivered")
         
         # Test webhook signing
         print("\n🔐 Testing payload signing...")
-        signature = manager._sign_payload('{"test": "data"}', "secret123")
+        signature = manager._sign_payload(b'{"test": "data"}', "secret123")
         print(f"✅ Signature generated: {signature[:20]}...")
         
         # Get stats
@@ -284,14 +312,16 @@ async def test_webhook_system():
             print(f"   Success rate: {stats['success_rate']:.1%}")
         
         # Cleanup
-        await manager.stop()
+        if owns_manager:
+            await manager.stop()
+        else:
+            manager.unregister_endpoint(endpoint_id)
         print("\n✅ Webhook system tests completed!")
         return True
         
     except Exception as e:
         print(f"\n❌ Webhook test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Webhook test failed")
         return False
 
 
@@ -307,8 +337,13 @@ async def test_alerting_engine():
             AlertSeverity, ConditionOperator
         )
         
-        # Initialize engine
-        engine = AlertingEngine()
+        # Initialize engine on manual clocks so time windows need no sleeping
+        start = datetime.utcnow()
+        elapsed = [timedelta(0)]
+        engine = AlertingEngine(
+            clock=lambda: start + elapsed[0],
+            monotonic_clock=lambda: elapsed[0] // timedelta(microseconds=1) * 1000
+        )
         await engine.start()
         
         # Create test rules
@@ -330,8 +365,6 @@ async def test_alerting_engine():
             actions=["log", "webhook"],
             cooldown_period=timedelta(minutes=5)
         )
-        engine.add_rule(rule1)
-        print("✅ Added high fraud score rule")
         
         # Rule 2: Multiple failures with time window
         rule2 = AlertRule(
@@ -350,8 +383,6 @@ async def test_alerting_engine():
             occurrence_threshold=3,
             actions=["log"]
         )
-        engine.add_rule(rule2)
-        print("✅ Added multiple failures rule")
         
         # Rule 3: Complex condition logic
         rule3 = AlertRule(
@@ -368,7 +399,9 @@ async def test_alerting_engine():
             actions=["log"],
             auto_resolve_after=timedelta(hours=1)
         )
-        engine.add_rule(rule3)
+        engine.add_rules([rule1, rule2, rule3])
+        print("✅ Added high fraud score rule")
+        print("✅ Added multiple failures rule")
         print("✅ Added complex security rule")
         
         # Test event evaluation
@@ -394,7 +427,7 @@ async def test_alerting_engine():
                 'location': {'country': 'UK'},
                 'proxy_id': f'proxy_{i}'
             })
-            await asyncio.sleep(0.1)
+            elapsed[0] += timedelta(seconds=30)  # Next failure 30s later, inside the window
         
         # Test deduplication
         print("\n🔁 Testing alert deduplication...")
@@ -435,12 +468,11 @@ async def test_alerting_engine():
         
     except Exception as e:
         print(f"\n❌ Alerting test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Alerting test failed")
         return False
 
 
-async def test_integration():
+async def test_integration(webhook_manager=None):
     """Test integration of all Phase 5 components"""
     print("\n" + "=" * 70)
     print("PHASE 5 TEST 5: Component Integration")
@@ -448,9 +480,8 @@ async def test_integration():
     
     try:
         # Import all components
-        from ml.proxy_predictor import ProxyQualityPredictor, ProxyFeatures
         from ml.rotation_detector import ProxyRotationDetector
-        from notifications.webhook_manager import WebhookManager, WebhookEndpoint, WebhookEvent
+        from notifications.webhook_manager import WebhookEndpoint, WebhookEvent
         from alerts.alerting_engine import (
             AlertingEngine, AlertRule, AlertCondition,
             AlertSeverity, ConditionOperator
@@ -459,12 +490,12 @@ async def test_integration():
         print("\n🔗 Testing component integration...")
         
         # Initialize components
-        predictor = ProxyQualityPredictor()
+        predictor = get_predictor()
         detector = ProxyRotationDetector()
-        webhook_manager = WebhookManager()
+        owns_manager = webhook_manager is None
+        if owns_manager:
+            webhook_manager = await start_webhook_manager()
         alerting_engine = AlertingEngine(webhook_manager)
-        
-        await webhook_manager.start()
         await alerting_engine.start()
         
         # Register webhook for alerts
@@ -473,7 +504,7 @@ async def test_integration():
             name="Alert Webhook",
             events=[WebhookEvent.SYSTEM_ERROR]
         )
-        webhook_manager.register_endpoint(webhook_endpoint)
+        webhook_endpoint_id = webhook_manager.register_endpoint(webhook_endpoint)
         
         # Create integrated alert rule
         ml_alert_rule = AlertRule(
@@ -502,42 +533,37 @@ async def test_integration():
         print("\n🔄 Testing integrated workflow...")
         
         # 1. Detect rotation
-        for i in range(15):
-            await detector.analyze_request(
-                proxy_ip="10.0.0.1",
-                proxy_port=8080,
-                exit_ip=f"20.0.0.{i%3+1}",
-                headers={"User-Agent": "Test"}
-            )
+        await detector.analyze_batch(
+            proxy_ip="10.0.0.1",
+            proxy_port=8080,
+            exit_ips=[f"20.0.0.{i%3+1}" for i in range(15)],
+            headers={"User-Agent": "Test"}
+        )
         
         rotation_summary = await detector.get_rotation_summary("10.0.0.1", 8080)
         
         # 2. Create features from rotation data
-        features = ProxyFeatures(
+        features = dataclasses.replace(
+            get_base_features(),
             response_time_ms=150.0,
             download_speed_mbps=30.0,
             upload_speed_mbps=15.0,
             latency_ms=50.0,
             jitter_ms=10.0,
             packet_loss=0.02,
-            protocol="socks5",
-            country_code="US",
             city="Chicago",
             asn="AS1234",
             is_residential=False,
-            is_mobile=False,
             is_datacenter=True,
             success_rate_7d=0.85,
             avg_uptime_hours=24.0,
             failure_count_24h=5,
             test_count_total=100,
             ssl_fingerprint_changes=2,
-            dns_leak_detected=False,
             ip_leak_detected=True,
             fraud_score=0.4,
             hour_of_day=10,
-            day_of_week=1,
-            is_weekend=False
+            day_of_week=1
         )
         
         # 3. Would make ML prediction (if model was trained)
@@ -562,16 +588,18 @@ async def test_integration():
         print("   4. Alert evaluated")
         
         # Cleanup
-        await webhook_manager.stop()
         await alerting_engine.stop()
+        if owns_manager:
+            await webhook_manager.stop()
+        else:
+            webhook_manager.unregister_endpoint(webhook_endpoint_id)
         
         print("\n✅ Integration tests completed!")
         return True
         
     except Exception as e:
         print(f"\n❌ Integration test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Integration test failed")
         return False
 
 
@@ -585,12 +613,31 @@ async def main():
     test_results = []
     
     try:
-        # Run all tests
-        test_results.append(("ML Quality Prediction", await test_ml_prediction()))
-        test_results.append(("Rotation Detection", await test_rotation_detection()))
-        test_results.append(("Webhook System", await test_webhook_system()))
-        test_results.append(("Alerting Engine", await test_alerting_engine()))
-        test_results.append(("Component Integration", await test_integration()))
+        async with contextlib.AsyncExitStack() as stack:
+            # One webhook manager, with one worker pool and HTTP client, is
+            # shared by the webhook and integration tests; if it can't start,
+            # each test starts its own and reports the error
+            try:
+                webhook_manager = await start_webhook_manager()
+            except Exception:
+                webhook_manager = None
+            else:
+                stack.push_async_callback(webhook_manager.stop)
+            
+            # Run all tests
+            # The subsystems are independent: run them concurrently, then
+            # replay their output in order
+            tests = [
+                ("ML Quality Prediction", test_ml_prediction),
+                ("Rotation Detection", test_rotation_detection),
+                ("Webhook System", functools.partial(test_webhook_system, webhook_manager)),
+                ("Alerting Engine", test_alerting_engine),
+            ]
+            
+            test_results.extend(await run_concurrently(tests))
+            
+            # Integration reuses every component, so it runs alone
+            test_results.append(("Component Integration", await test_integration(webhook_manager)))
         
         # Summary
         print("\n" + "=" * 70)
@@ -629,8 +676,7 @@ async def main():
         print("\n\n⚠️ Tests interrupted by user")
     except Exception as e:
         print(f"\n\n❌ Test suite failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Test suite failed")
 
 
 if __name__ == "__main__":
@@ -639,5 +685,12 @@ if __name__ == "__main__":
         print("❌ Python 3.7+ required")
         sys.exit(1)
     
+    # Use the libuv event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run tests
     asyncio.run(main())
\ No newline at end of file
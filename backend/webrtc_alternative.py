@@ -6,17 +6,91 @@ Since WebRTC is browser-only, we simulate similar leak detection
 
 import asyncio
 import aiohttp
-import aiohttp_socks
+import os
+import re
 import socket
+import struct
+import time
 import ipaddress
-from typing import Dict, List, Optional, Set
+import psutil
+from typing import Dict, List, Optional, Set, Tuple
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 import logging
-import httpx
 from urllib.parse import urlparse
+from python_socks import ProxyError
+from proxy_sessions import DNS_CACHE_TTL, ProxySessionCache, proxy_session, resolve_host
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
 
 logger = logging.getLogger(__name__)
 
+# Dotted-quad IPv4 with each octet limited to 0-255
+IPV4_PATTERN = re.compile(r'\b(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\b')
+# Full (uncompressed) eight-group IPv6
+IPV6_PATTERN = re.compile(r'(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}')
+
+# Networks whose addresses count as local rather than public
+PRIVATE_NETWORKS = tuple(ipaddress.ip_network(net) for net in (
+    '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '127.0.0.0/8',
+    '169.254.0.0/16', '::1/128', 'fc00::/7', 'fe80::/10',
+))
+# (network, netmask) integer pairs per IP version for a masked compare
+_PRIVATE_RANGES = {
+    version: tuple((int(net.network_address), int(net.netmask))
+                   for net in PRIVATE_NETWORKS if net.version == version)
+    for version in (4, 6)
+}
+
+
+def _is_private(ip_obj) -> bool:
+    """Whether an address falls in PRIVATE_NETWORKS"""
+    value = int(ip_obj)
+    return any(value & netmask == network for network, netmask in _PRIVATE_RANGES[ip_obj.version])
+
+
+# Most bytes of a trace body read when looking for the ip= line
+TRACE_MAX_BYTES = 8192
+
+# Seconds to wait for a STUN binding response
+STUN_TIMEOUT = 2.0
+
+# STUN (RFC 5389) message types, attributes and magic cookie
+STUN_BINDING_REQUEST = 0x0001
+STUN_BINDING_SUCCESS = 0x0101
+STUN_MAPPED_ADDRESS = 0x0001
+STUN_XOR_MAPPED_ADDRESS = 0x0020
+STUN_MAGIC_COOKIE = 0x2112A442
+
+# Seconds local interface IPs and DNS probe answers are reused across scans
+LOCAL_IP_CACHE_TTL = 60
+DNS_PROBE_CACHE_TTL = 30
+
+# Connection cap for the session that serves HTTP proxies
+HTTP_CONNECTION_LIMIT = 50
+
+# Failures a probe through a proxy can raise; aiohttp_socks passes
+# python_socks errors through unwrapped (ProxyConnectionError is an OSError)
+PROBE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError, ProxyError)
+
+
+class _StunProtocol(asyncio.DatagramProtocol):
+    """Completes a future with the first datagram received"""
+    
+    def __init__(self, response: asyncio.Future):
+        self.response = response
+    
+    def datagram_received(self, data: bytes, addr):
+        if not self.response.done():
+            self.response.set_result(data)
+    
+    def error_received(self, exc: Exception):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
 
 @dataclass
 class IPLeakResult:
@@ -36,7 +110,17 @@ class IPLeakDetector:
     Simulates WebRTC-style leak detection for Python
     """
     
-    def __init__(self):
+    def __init__(self, sessions: Optional[ProxySessionCache] = None):
+        # Shared pool, if any; without one each probe opens (and closes) its own session
+        self.sessions = sessions
+        
+        # (monotonic timestamp, result) caches; results change on the order of minutes
+        self._local_ip_cache: Optional[Tuple[float, Set[str]]] = None
+        self._dns_cache: Dict[str, Tuple[float, Set[str]]] = {}
+        
+        # Plain session for HTTP proxies, which aiohttp takes per request
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        
         # Services that echo back various IPs
         self.ip_check_services = [
             {
@@ -68,55 +152,115 @@ class IPLeakDetector:
             ('stun.stunprotocol.org', 3478),
         ]
     
-    async def detect_leaks(self, proxy_url: str, expected_ip: str) -> IPLeakResult:
+    async def close(self):
+        """Close the HTTP-proxy session; a shared pool is left to its owner"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+    
+    @asynccontextmanager
+    async def _probe_session(self, proxy_url: str):
+        """Yield a session to probe through a proxy, plus the per-request proxy argument"""
+        if urlparse(proxy_url).scheme in ['socks4', 'socks5']:
+            async with proxy_session(proxy_url, self.sessions) as session:
+                yield session, None
+            return
+        
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=HTTP_CONNECTION_LIMIT,
+                    ttl_dns_cache=DNS_CACHE_TTL,  # The proxy host is resolved locally here
+                    # Non-blocking c-ares lookups instead of the threaded system resolver
+                    resolver=aiohttp.AsyncResolver() if aiodns is not None else None,
+                    enable_cleanup_closed=True
+                )
+            )
+        yield self._http_session, proxy_url
+    
+    async def warm_dns(self):
+        """Pre-resolve the STUN servers into the shared DNS cache"""
+        # Check services are deliberately not resolved here: through a proxy
+        # they must resolve remotely, and a local lookup would itself leak
+        results = await asyncio.gather(
+            *(resolve_host(host) for host, _ in self.stun_servers),
+            return_exceptions=True
+        )
+        for (host, _), result in zip(self.stun_servers, results):
+            if isinstance(result, Exception):
+                logger.debug(f"DNS pre-resolution failed for {host}: {result}")
+    
+    async def __aenter__(self):
+        await self.warm_dns()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def detect_leaks(self, proxy_url: str, expected_ip: str,
+                           fast_fail: bool = False) -> IPLeakResult:
         """
         Detect IP leaks through multiple methods
         Similar to WebRTC leak detection but for Python
+        
+        With fast_fail, the first stage to report an unexpected public IP
+        ends the scan and the remaining stages are cancelled
         """
         detected_ips = set()
-        local_ips = set()
-        public_ips = set()
-        leak_sources = []
         
         # 1. Get local network interfaces
         local_ips = self._get_local_ips()
         
-        # 2. Test through multiple IP detection services
-        service_ips = await self._check_ip_services(proxy_url)
-        detected_ips.update(service_ips)
-        
-        # 3. STUN-like protocol test (UDP through proxy)
-        stun_ips = await self._check_stun_like(proxy_url)
-        detected_ips.update(stun_ips)
-        
-        # 4. DNS resolution leak test
-        dns_ips = await self._check_dns_resolution(proxy_url)
-        detected_ips.update(dns_ips)
-        
-        # 5. Check for JavaScript-based leaks (simulate)
-        js_leaks = await self._check_javascript_apis(proxy_url)
-        detected_ips.update(js_leaks)
+        # 2-5. The network checks are independent, so run them concurrently:
+        # IP detection services, STUN-like UDP test, DNS resolution leak test
+        # and (simulated) JavaScript-based leaks
+        services_task = asyncio.create_task(self._check_ip_services(proxy_url))
+        pending = {
+            services_task,
+            asyncio.create_task(self._check_stun_like(proxy_url)),
+            asyncio.create_task(self._check_dns_resolution(proxy_url)),
+            asyncio.create_task(self._check_javascript_apis(proxy_url)),
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.debug(f"Leak check stage failed: {task.exception()}")
+                    else:
+                        detected_ips.update(task.result())
+                
+                if fast_fail and self._has_public_leak(detected_ips, expected_ip):
+                    break
+        finally:
+            # Leftover stages after a fast fail (or on our own cancellation)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
-        # Analyze results
-        is_leaking = False
-        confidence = 0.0
+        service_ips = (services_task.result()
+                       if services_task.done() and not services_task.cancelled()
+                       and services_task.exception() is None else set())
         
-        # Separate public and local IPs
+        # Analyze results: parse each detected IP once, dropping invalid ones
+        addresses = []
         for ip in detected_ips:
             try:
-                ip_obj = ipaddress.ip_address(ip)
-                if ip_obj.is_private:
-                    local_ips.add(ip)
-                else:
-                    public_ips.add(ip)
-                    
-                    # Check if public IP matches expected
-                    if ip != expected_ip:
-                        is_leaking = True
-                        leak_sources.append(f"Public IP {ip} detected")
-            except:
+                addresses.append((ip, ipaddress.ip_address(ip)))
+            except ValueError:
                 pass
         
+        # Separate public and local IPs
+        private = {ip for ip, ip_obj in addresses if _is_private(ip_obj)}
+        local_ips.update(private)
+        public_ips = {ip for ip, _ in addresses} - private
+        
+        # Any public IP other than the expected one is a leak
+        leaked_ips = public_ips - {expected_ip}
+        leak_sources = [f"Public IP {ip} detected" for ip in leaked_ips]
+        is_leaking = bool(leaked_ips)
+        
         # Local IP detection is also a form of leak
         if local_ips:
             leak_sources.append(f"Local IPs exposed: {', '.join(local_ips)}")
@@ -136,71 +280,77 @@ class IPLeakDetector:
             confidence=confidence
         )
     
+    def _has_public_leak(self, ips: Set[str], expected_ip: str) -> bool:
+        """Whether any valid public IP other than the expected one was seen"""
+        for ip in ips:
+            if ip == expected_ip:
+                continue
+            try:
+                if not _is_private(ipaddress.ip_address(ip)):
+                    return True
+            except ValueError:
+                pass
+        return False
+    
     def _get_local_ips(self) -> Set[str]:
-        """Get local network interface IPs"""
+        """Get local network interface IPs, cached for LOCAL_IP_CACHE_TTL"""
+        now = time.monotonic()
+        if self._local_ip_cache and now - self._local_ip_cache[0] < LOCAL_IP_CACHE_TTL:
+            # Copy: detect_leaks adds to the returned set
+            return set(self._local_ip_cache[1])
+        
+        local_ips = self._enumerate_local_ips()
+        self._local_ip_cache = (now, local_ips)
+        return set(local_ips)
+    
+    def _enumerate_local_ips(self) -> Set[str]:
+        """Enumerate local network interface IPs"""
         local_ips = set()
         
         try:
-            # Get hostname
-            hostname = socket.gethostname()
-            
-            # Get all IPs associated with hostname
-            host_ips = socket.gethostbyname_ex(hostname)[2]
-            local_ips.update(host_ips)
-            
-            # Also check all network interfaces
-            import netifaces
-            for interface in netifaces.interfaces():
-                addrs = netifaces.ifaddresses(interface)
-                if netifaces.AF_INET in addrs:
-                    for addr in addrs[netifaces.AF_INET]:
-                        ip = addr.get('addr')
-                        if ip:
-                            local_ips.add(ip)
-        except:
+            # Every IPv4 address on every network interface, in one call
+            local_ips.update(
+                addr.address
+                for addrs in psutil.net_if_addrs().values()
+                for addr in addrs
+                if addr.family == socket.AF_INET
+            )
+        except (OSError, psutil.Error) as e:
+            logger.debug(f"Interface enumeration failed: {e}")
             # Fallback method
             try:
                 # Create a socket and connect to external server
                 with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
                     s.connect(("8.8.8.8", 80))
                     local_ips.add(s.getsockname()[0])
-            except:
-                pass
+            except OSError as e:
+                logger.debug(f"Local IP fallback failed: {e}")
         
         return local_ips
     
     async def _check_ip_services(self, proxy_url: str) -> Set[str]:
-        """Check IP through various services"""
-        detected_ips = set()
-        parsed = urlparse(proxy_url)
+        """Check IP through various services, querying them all concurrently"""
+        # One session for the whole fan-out so probes share the proxy connection
+        async with self._probe_session(proxy_url) as (session, proxy):
+            ips = await asyncio.gather(*(
+                self._query_service(session, proxy, service)
+                for service in self.ip_check_services
+            ))
         
-        for service in self.ip_check_services:
-            try:
-                if parsed.scheme in ['socks4', 'socks5']:
-                    connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
-                    timeout = aiohttp.ClientTimeout(total=10)
-                    
-                    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-                        async with session.get(service['url']) as response:
-                            if response.status == 200:
-                                data = await response.json()
-                                ip = self._extract_ip_from_json(data, service['json_path'])
-                                if ip:
-                                    detected_ips.add(ip)
-                else:
-                    # HTTP proxy
-                    async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=10.0) as client:
-                        response = await client.get(service['url'])
-                        if response.status_code == 200:
-                            data = response.json()
-                            ip = self._extract_ip_from_json(data, service['json_path'])
-                            if ip:
-                                detected_ips.add(ip)
-                                
-            except Exception as e:
-                logger.debug(f"IP service check failed for {service['name']}: {e}")
-        
-        return detected_ips
+        return {ip for ip in ips if ip}
+    
+    async def _query_service(self, session: aiohttp.ClientSession, proxy: Optional[str],
+                             service: Dict) -> Optional[str]:
+        """Ask one IP service for our address"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with session.get(service['url'], proxy=proxy, timeout=timeout) as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    return self._extract_ip_from_json(data, service['json_path'])
+        except (*PROBE_ERRORS, ValueError) as e:
+            logger.debug(f"IP service check failed for {service['name']}: {e}")
+        return None
     
     def _extract_ip_from_json(self, data: Dict, path: str) -> Optional[str]:
         """Extract IP from JSON response"""
@@ -213,20 +363,28 @@ class IPLeakDetector:
                 if value is None:
                     return None
             
-            # Extract IP if it's in a string with other data
             if isinstance(value, str):
-                import re
+                # Usually the value is just the address, or a comma-separated
+                # forwarding chain ("client, proxy") whose first entry is ours
+                for part in value.split(','):
+                    try:
+                        return str(ipaddress.ip_address(part.strip()))
+                    except ValueError:
+                        pass
+                
+                # Extract IP if it's in a string with other data
                 # Match IPv4
-                ip_match = re.search(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', value)
+                ip_match = IPV4_PATTERN.search(value)
                 if ip_match:
                     return ip_match.group()
                 # Match IPv6
-                ipv6_match = re.search(r'(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}', value)
+                ipv6_match = IPV6_PATTERN.search(value)
                 if ipv6_match:
                     return ipv6_match.group()
             
             return str(value) if value else None
-        except:
+        except (AttributeError, TypeError):
+            # Response shape doesn't match the path (e.g. a list or scalar)
             return None
     
     async def _check_stun_like(self, proxy_url: str) -> Set[str]:
@@ -246,28 +404,17 @@ class IPLeakDetector:
             for stun_server, port in self.stun_servers[:1]:  # Test one server
                 try:
                     # Get server IP
-                    server_ip = socket.gethostbyname(stun_server)
-                    
-                    # Create STUN binding request (simplified)
-                    # Real STUN is more complex
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                    sock.settimeout(2)
+                    server_ip = (await resolve_host(stun_server))[0]
                     
-                    # STUN binding request header (simplified)
-                    msg = b'\x00\x01' + b'\x00\x00' + b'\x21\x12\xa4\x42' + b'\x00' * 12
+                    transaction_id = os.urandom(12)
+                    response = await self._stun_exchange(server_ip, port, transaction_id)
                     
-                    sock.sendto(msg, (server_ip, port))
+                    # The mapped address is the public IP the server saw
+                    mapped_ip = self._parse_stun_response(response, transaction_id)
+                    if mapped_ip:
+                        detected_ips.add(mapped_ip)
                     
-                    # Try to receive response
-                    data, addr = sock.recvfrom(1024)
-                    
-                    # Parse response (simplified - real parsing is complex)
-                    # Look for XOR-MAPPED-ADDRESS attribute
-                    # This would contain the public IP
-                    
-                    sock.close()
-                    
-                except socket.timeout:
+                except asyncio.TimeoutError:
                     pass
                 except Exception as e:
                     logger.debug(f"STUN test failed: {e}")
@@ -277,6 +424,69 @@ class IPLeakDetector:
         
         return detected_ips
     
+    async def _stun_exchange(self, server_ip: str, port: int, transaction_id: bytes) -> bytes:
+        """Send a STUN binding request and wait for the reply without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        response = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StunProtocol(response),
+            remote_addr=(server_ip, port)
+        )
+        
+        try:
+            # Binding request: header only, no attributes
+            msg = struct.pack('!HHI12s', STUN_BINDING_REQUEST, 0, STUN_MAGIC_COOKIE, transaction_id)
+            transport.sendto(msg)
+            
+            # Try to receive response
+            return await asyncio.wait_for(response, STUN_TIMEOUT)
+        finally:
+            transport.close()
+    
+    def _parse_stun_response(self, data: bytes, transaction_id: bytes) -> Optional[str]:
+        """Extract the (XOR-)MAPPED-ADDRESS from a STUN binding success response"""
+        mv = memoryview(data)
+        if len(mv) < 20:
+            return None
+        
+        msg_type, msg_len, cookie = struct.unpack_from('!HHI', mv, 0)
+        if (msg_type != STUN_BINDING_SUCCESS or cookie != STUN_MAGIC_COOKIE
+                or mv[8:20] != transaction_id):
+            return None
+        
+        mapped = None
+        offset, end = 20, min(len(mv), 20 + msg_len)
+        while offset + 4 <= end:
+            attr_type, attr_len = struct.unpack_from('!HH', mv, offset)
+            value = mv[offset + 4:offset + 4 + attr_len]
+            # Attributes are padded to a 4-byte boundary
+            offset += 4 + (attr_len + 3 & ~3)
+            
+            if attr_type not in (STUN_XOR_MAPPED_ADDRESS, STUN_MAPPED_ADDRESS) or len(value) < 8:
+                continue
+            
+            family = value[1]
+            if family == 0x01:
+                address = value[4:8]
+                if attr_type == STUN_XOR_MAPPED_ADDRESS:
+                    address = (int.from_bytes(address, 'big') ^ STUN_MAGIC_COOKIE).to_bytes(4, 'big')
+                ip = socket.inet_ntoa(address)
+            elif family == 0x02 and len(value) >= 20:
+                address = value[4:20]
+                if attr_type == STUN_XOR_MAPPED_ADDRESS:
+                    mask = struct.pack('!I', STUN_MAGIC_COOKIE) + transaction_id
+                    address = bytes(a ^ m for a, m in zip(address, mask))
+                ip = socket.inet_ntop(socket.AF_INET6, address)
+            else:
+                continue
+            
+            # XOR-MAPPED-ADDRESS is authoritative; plain MAPPED-ADDRESS is a fallback
+            if attr_type == STUN_XOR_MAPPED_ADDRESS:
+                return ip
+            mapped = mapped or ip
+        
+        return mapped
+    
     async def _check_dns_resolution(self, proxy_url: str) -> Set[str]:
         """Check for DNS resolution leaks"""
         detected_ips = set()
@@ -287,16 +497,33 @@ class IPLeakDetector:
             'whoami.akamai.net',
         ]
         
-        for domain in test_domains:
-            try:
-                # Resolve through system (might bypass proxy)
-                ips = socket.gethostbyname_ex(domain)[2]
-                detected_ips.update(ips)
-            except:
-                pass
+        # Resolve through system (might bypass proxy), all domains at once
+        results = await asyncio.gather(*(self._resolve_probe(domain) for domain in test_domains))
+        for ips in results:
+            detected_ips.update(ips)
         
         return detected_ips
     
+    async def _resolve_probe(self, domain: str) -> Set[str]:
+        """Resolve a DNS probe domain, cached for DNS_PROBE_CACHE_TTL"""
+        now = time.monotonic()
+        cached = self._dns_cache.get(domain)
+        if cached and now - cached[0] < DNS_PROBE_CACHE_TTL:
+            return cached[1]
+        
+        try:
+            # getaddrinfo runs in the loop's executor instead of blocking it
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(domain, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except OSError as e:
+            # Serve the stale answer, if any, rather than nothing
+            logger.debug(f"DNS probe failed for {domain}: {e}")
+            return cached[1] if cached else set()
+        
+        ips = {info[4][0] for info in infos}
+        self._dns_cache[domain] = (now, ips)
+        return ips
+    
     async def _check_javascript_apis(self, proxy_url: str) -> Set[str]:
         """
         Simulate JavaScript API checks
@@ -309,30 +536,31 @@ class IPLeakDetector:
             'https://www.cloudflare.com/cdn-cgi/trace',  # Returns various info
         ]
         
-        parsed = urlparse(proxy_url)
-        
-        for service in js_services:
-            try:
-                if parsed.scheme in ['socks4', 'socks5']:
-                    connector = aiohttp_socks.ProxyConnector.from_url(proxy_url)
-                    async with aiohttp.ClientSession(connector=connector) as session:
-                        async with session.get(service, timeout=5) as response:
-                            text = await response.text()
-                            # Parse response for IPs
-                            import re
-                            ips = re.findall(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', text)
-                            detected_ips.update(ips)
-                else:
-                    async with httpx.AsyncClient(proxies={'all://': proxy_url}, timeout=5.0) as client:
-                        response = await client.get(service)
-                        text = response.text
-                        import re
-                        ips = re.findall(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', text)
-                        detected_ips.update(ips)
-            except:
-                pass
+        async with self._probe_session(proxy_url) as (session, proxy):
+            for service in js_services:
+                try:
+                    async with session.get(service, proxy=proxy, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                        # The trace is a few hundred bytes; never pull in more than the cap
+                        body = await response.content.read(TRACE_MAX_BYTES)
+                        ip = self._parse_trace_ip(body.decode('utf-8', 'replace'))
+                        if ip:
+                            # One reported IP is all a service can tell us
+                            detected_ips.add(ip)
+                            break
+                except PROBE_ERRORS as e:
+                    logger.debug(f"Trace check failed for {service}: {e}")
         
         return detected_ips
+    
+    def _parse_trace_ip(self, text: str) -> Optional[str]:
+        """Pull the validated ip= entry out of a key=value trace body"""
+        for line in text.splitlines():
+            if line.startswith('ip='):
+                try:
+                    return str(ipaddress.ip_address(line[3:].strip()))
+                except ValueError:
+                    return None
+        return None
 
 
 # Test function
@@ -346,13 +574,12 @@ async def test_ip_leak_detection():
     proxy_url = "socks5://167.172.224.108:1080"
     expected_ip = "167.172.224.108"
     
-    detector = IPLeakDetector()
-    
     print(f"\n🔍 Testing proxy: {proxy_url}")
     print(f"Expected IP: {expected_ip}")
     print("\nRunning leak detection...\n")
     
-    result = await detector.detect_leaks(proxy_url, expected_ip)
+    async with IPLeakDetector() as detector:
+        result = await detector.detect_leaks(proxy_url, expected_ip)
     
     print("📊 Results:")
     print(f"  Is Leaking: {'❌ YES' if result.is_leaking else '✅ NO'}")
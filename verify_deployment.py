@@ -20,12 +20,24 @@ BLUE = '\033[94m'
 RESET = '\033[0m'
 BOLD = '\033[1m'
 
+# Pool sized so the concurrent checks never queue for a connection
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the verifier client, multiplexing over HTTP/2 when h2 is installed"""
+    try:
+        return httpx.AsyncClient(http2=True, timeout=30.0, limits=HTTP_LIMITS)
+    except ImportError:
+        return httpx.AsyncClient(timeout=30.0, limits=HTTP_LIMITS)
+
+
 class DeploymentVerifier:
     def __init__(self, backend_url: str = "http://localhost:8000", 
                  frontend_url: str = "http://localhost:8080"):
         self.backend_url = backend_url
         self.frontend_url = frontend_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = create_http_client()
         self.results = []
         
     async def verify_all(self):
@@ -36,7 +48,8 @@ class DeploymentVerifier:
         print(f"Frontend: {self.frontend_url}")
         print("=" * 60)
         
-        tests = [
+        # Independent endpoint checks - overlapped on the shared client
+        parallel_tests = [
             ("Backend Health", self.test_backend_health),
             ("Frontend Access", self.test_frontend_access),
             ("WebSocket Connection", self.test_websocket),
@@ -46,11 +59,20 @@ class DeploymentVerifier:
             ("Import Feature", self.test_import),
             ("Advanced Testing", self.test_advanced_features),
             ("Database Connection", self.test_database),
+        ]
+        
+        # Timing-sensitive checks - run back to back once the rest are done
+        serial_tests = [
             ("Caching System", self.test_caching),
         ]
         
-        for test_name, test_func in tests:
-            await self.run_test(test_name, test_func)
+        # gather keeps declaration order, so the summary stays stable
+        self.results.extend(await asyncio.gather(
+            *(self.run_test(name, func) for name, func in parallel_tests)
+        ))
+        
+        for test_name, test_func in serial_tests:
+            self.results.append(await self.run_test(test_name, test_func))
         
         # Summary
         self.print_summary()
@@ -61,25 +83,24 @@ class DeploymentVerifier:
         failed = sum(1 for _, passed, _ in self.results if not passed)
         return 0 if failed == 0 else 1
     
-    async def run_test(self, name: str, test_func):
-        """Run a single test"""
-        print(f"\n{BLUE}Testing:{RESET} {name}...", end='', flush=True)
-        
+    async def run_test(self, name: str, test_func) -> Tuple[str, bool, str]:
+        """Run a single test and return its (name, passed, message) result"""
+        # Status is printed on one line at completion so concurrent tests don't interleave
         try:
             start_time = time.time()
             result = await test_func()
             duration = time.time() - start_time
             
             if result:
-                print(f" {GREEN}✓ PASSED{RESET} ({duration:.2f}s)")
-                self.results.append((name, True, f"Passed in {duration:.2f}s"))
-            else:
-                print(f" {RED}✗ FAILED{RESET}")
-                self.results.append((name, False, "Test returned False"))
+                print(f"\n{BLUE}Testing:{RESET} {name}... {GREEN}✓ PASSED{RESET} ({duration:.2f}s)")
+                return (name, True, f"Passed in {duration:.2f}s")
+            
+            print(f"\n{BLUE}Testing:{RESET} {name}... {RED}✗ FAILED{RESET}")
+            return (name, False, "Test returned False")
                 
         except Exception as e:
-            print(f" {RED}✗ ERROR{RESET}")
-            self.results.append((name, False, str(e)))
+            print(f"\n{BLUE}Testing:{RESET} {name}... {RED}✗ ERROR{RESET}")
+            return (name, False, str(e))
             
     async def test_backend_health(self) -> bool:
         """Test backend is running"""
@@ -239,16 +260,21 @@ class DeploymentVerifier:
     
     async def test_caching(self) -> bool:
         """Test caching system"""
-        # Make two identical requests
+        # Make two identical requests, timing each one with the monotonic clock
+        start = time.perf_counter()
         response1 = await self.client.get(f"{self.backend_url}/analytics")
-        time1 = time.time()
+        time1 = time.perf_counter() - start
         
+        start = time.perf_counter()
         response2 = await self.client.get(f"{self.backend_url}/analytics")
-        time2 = time.time()
+        time2 = time.perf_counter() - start
+        
+        if response1.status_code != 200 or response2.status_code != 200:
+            return False
         
-        # Second request should be faster (cached)
-        if response1.status_code == 200 and response2.status_code == 200:
-            print(f"\n  {GREEN}→ Caching working (second request faster){RESET}")
+        # Second request should be served from cache - allow a small floor for fast backends
+        if time2 < max(time1 * 0.6, 0.005):
+            print(f"\n  {GREEN}→ Caching working ({time1 * 1000:.1f}ms → {time2 * 1000:.1f}ms){RESET}")
             return True
         
         return False